@@ -2,13 +2,20 @@
 Модуль авторизации: JWT, middleware.
 """
 
+import asyncio
+import hashlib
 import os
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
 from api.database import get_database
 from api.models import User
 
@@ -16,9 +23,111 @@ from api.models import User
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+# Ключ HMAC собирается один раз: jose иначе разбирает строку ключа на каждом вызове
+_JWT_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+# Формат sub: ObjectId в hex; мусорные значения отсекаются без разбора в ObjectId
+_OBJECT_ID_RE = re.compile(r"[0-9a-fA-F]{24}")
+# Версия набора claims; токены другой версии перепроверяются по БД
+TOKEN_SCHEMA_VERSION = 1
+
+# Кэш проверенных токенов: blake2b(token) -> (payload, истекает_в)
+TOKEN_CACHE_TTL_SECONDS = 60.0
+TOKEN_CACHE_MAX_SIZE = 10_000
+_token_cache: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+# Токены без exp/sub отклоняются при декодировании
+_DECODE_OPTIONS = {"require_exp": True, "require_sub": True}
+
+# Кэш пользователей: user_id -> (User, истекает_в). Сбрасывается
+# invalidate_user_cache при изменении интересов пользователя
+USER_CACHE_TTL_SECONDS = 30.0
+USER_CACHE_MAX_SIZE = 10_000
+_user_cache: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+# Запросы пользователя в БД, выполняющиеся сейчас: параллельные промахи
+# кэша по одному user_id ждут один find_one
+_user_inflight: Dict[str, "asyncio.Task[Optional[Dict[str, Any]]]"] = {}
+
+# Поля документа users, нужные для модели User
+_USER_PROJECTION = {"nickname": 1, "name": 1, "interests": 1, "interest_scores": 1}
+# Для входа interest_scores не нужны: в токен попадают только interests
+_LOGIN_USER_PROJECTION = {"nickname": 1, "name": 1, "interests": 1}
 
 # HTTP Bearer для извлечения токена
 security = HTTPBearer()
+# Общий экземпляр для опциональной авторизации: FastAPI кэширует его результат в рамках запроса
+security_optional = HTTPBearer(auto_error=False)
+
+
+def _verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Проверка подписи JWT с TTL-кэшем проверенных payload.
+
+    Подпись HS256 проверяется один раз на токен; запись живёт
+    не дольше TTL и не дольше срока действия токена.
+
+    Args:
+        token: JWT токен
+
+    Returns:
+        Payload токена или None, если токен невалиден
+    """
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    now = time.time()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        payload, expires_at = cached
+        if now < expires_at:
+            _token_cache.move_to_end(key)
+            return payload
+        del _token_cache[key]
+
+    try:
+        payload = jwt.decode(token, _JWT_KEY, algorithms=[ALGORITHM], options=_DECODE_OPTIONS)
+    except JWTError:
+        return None
+
+    expires_at = now + TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, float(exp))
+    _token_cache[key] = (payload, expires_at)
+    if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+        _token_cache.popitem(last=False)
+    return payload
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """
+    Сброс закэшированного пользователя после изменения его документа.
+
+    Args:
+        user_id: ID пользователя
+    """
+    _user_cache.pop(str(user_id), None)
+    # Уже идущий запрос мог прочитать документ до изменения — его результат не кэшируем
+    _user_inflight.pop(str(user_id), None)
+
+
+def _decode_token_claims(token: str) -> Optional[Tuple[str, str]]:
+    """
+    Извлечение (user_id, nickname) из проверенного JWT.
+
+    Кэшируются только проверенные claims, а не пользователь: интересы
+    пользователя меняются при лайках, поэтому документ читается из БД.
+
+    Args:
+        token: JWT токен
+
+    Returns:
+        (user_id, nickname) или None, если токен невалиден или sub — не ObjectId
+    """
+    payload = _verify_token(token)
+    if payload is None:
+        return None
+    user_id = payload.get("sub")
+    nickname = payload.get("nickname")
+    if nickname is None or not isinstance(user_id, str) or not _OBJECT_ID_RE.fullmatch(user_id):
+        return None
+    return user_id, nickname
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -31,31 +140,44 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.setdefault("v", TOKEN_SCHEMA_VERSION)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def _user_from_document(user_data: Dict[str, Any]) -> User:
+    """
+    Сборка User из документа users без валидации Pydantic.
+
+    Документы пишет только create_user и сервис интересов, а чтение идёт
+    с проекцией, поэтому поля уже имеют нужные типы и повторная валидация
+    на каждом запросе не нужна.
+
+    Args:
+        user_data: Документ пользователя из MongoDB
+
+    Returns:
+        Объект User
+    """
+    return User.model_construct(
+        id=str(user_data["_id"]),
+        nickname=user_data["nickname"],
+        name=user_data.get("name", ""),
+        interests=user_data.get("interests") or [],
+        interest_scores=user_data.get("interest_scores") or {},
+    )
+
+
 async def get_user_by_nickname(nickname: str, db: AsyncIOMotorDatabase) -> Optional[User]:
-    """Получение пользователя по nickname."""
-    from bson import ObjectId
-    user_data = await db.users.find_one({"nickname": nickname})
+    """Получение пользователя по nickname (без interest_scores — для входа)."""
+    user_data = await db.users.find_one({"nickname": nickname}, _LOGIN_USER_PROJECTION)
     if user_data:
-        user_data["_id"] = str(user_data["_id"])
-        return User(**user_data)
+        return _user_from_document(user_data)
     return None
 
 
 async def create_user(nickname: str, name: str, db: AsyncIOMotorDatabase) -> User:
     """Создание нового пользователя."""
-    # Проверка существования пользователя
-    existing_user = await get_user_by_nickname(nickname, db)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Пользователь с таким nickname уже существует"
-        )
-    
-    # Создание пользователя
     user_data = {
         "nickname": nickname,
         "name": name,
@@ -63,9 +185,17 @@ async def create_user(nickname: str, name: str, db: AsyncIOMotorDatabase) -> Use
         "interest_scores": {}
     }
     
-    result = await db.users.insert_one(user_data)
-    user_data["_id"] = str(result.inserted_id)
-    return User(**user_data)
+    # Уникальность nickname обеспечивает индекс users.nickname (создаётся при старте API):
+    # одна вставка вместо find + insert и без гонки между ними
+    try:
+        result = await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Пользователь с таким nickname уже существует"
+        )
+    user_data["_id"] = result.inserted_id
+    return _user_from_document(user_data)
 
 
 async def authenticate_user(nickname: str, db: AsyncIOMotorDatabase) -> Optional[User]:
@@ -74,61 +204,161 @@ async def authenticate_user(nickname: str, db: AsyncIOMotorDatabase) -> Optional
     return user
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-) -> User:
-    """Получение текущего пользователя из JWT токена."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    """Ошибка 401 для невалидного токена или неизвестного пользователя."""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось подтвердить учетные данные",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def _load_user(user_id: str, db: AsyncIOMotorDatabase) -> Optional[User]:
+    """
+    Пользователь по ID из кэша или из БД.
+
+    Args:
+        user_id: ID пользователя (формат уже проверен в _decode_token_claims)
+        db: База данных
+
+    Returns:
+        Пользователь или None, если документа нет
+    """
+    now = time.time()
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        user, expires_at = cached
+        if now < expires_at:
+            _user_cache.move_to_end(user_id)
+            return user
+        del _user_cache[user_id]
     
+    task = _user_inflight.get(user_id)
+    if task is not None:
+        # shield: отмена одного ожидающего запроса не отменяет общий find_one
+        user_data = await asyncio.shield(task)
+        return _user_from_document(user_data) if user_data is not None else None
+    
+    task = asyncio.ensure_future(
+        db.users.find_one({"_id": ObjectId(user_id)}, _USER_PROJECTION)
+    )
+    _user_inflight[user_id] = task
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        nickname: str = payload.get("nickname")
-        if user_id is None or nickname is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        user_data = await asyncio.shield(task)
+    finally:
+        owner = _user_inflight.get(user_id) is task
+        if owner:
+            del _user_inflight[user_id]
+    if user_data is None:
+        return None
     
-    # Получение пользователя из БД
-    from bson import ObjectId
-    if not ObjectId.is_valid(user_id):
-        raise credentials_exception
+    user = _user_from_document(user_data)
+    if not owner:
+        return user
     
-    user_data = await db.users.find_one({"_id": ObjectId(user_id)})
-    if user_data is None:
-        raise credentials_exception
+    _user_cache[user_id] = (user, now + USER_CACHE_TTL_SECONDS)
+    if len(_user_cache) > USER_CACHE_MAX_SIZE:
+        _user_cache.popitem(last=False)
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> User:
+    """Получение текущего пользователя из JWT токена."""
+    claims = _decode_token_claims(credentials.credentials)
+    if claims is None:
+        raise _credentials_exception()
+    
+    user = await _load_user(claims[0], db)
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+def _user_from_claims(payload: Dict[str, Any], claims: Tuple[str, str]) -> User:
+    """
+    Сборка User из claims токена текущей версии схемы.
+
+    Args:
+        payload: Проверенный payload JWT
+        claims: (user_id, nickname) из _decode_token_claims
+
+    Returns:
+        Объект User без interest_scores
+    """
+    user_id, nickname = claims
+    return User.model_construct(
+        id=user_id,
+        nickname=nickname,
+        name=payload.get("name", ""),
+        interests=payload.get("interests") or [],
+        interest_scores={}
+    )
+
+
+async def get_current_user_from_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> User:
+    """
+    Получение текущего пользователя только из claims JWT, без запроса к БД.
+
+    Для эндпоинтов, которым нужен лишь id пользователя: interests в токене
+    отражают момент входа, interest_scores не передаются. Токены другой
+    версии схемы (claim "v") обрабатываются через get_current_user.
+    """
+    payload = _verify_token(credentials.credentials)
+    if payload is None or payload.get("v") != TOKEN_SCHEMA_VERSION:
+        return await get_current_user(credentials, db)
     
-    user_data["_id"] = str(user_data["_id"])
-    return User(**user_data)
+    claims = _decode_token_claims(credentials.credentials)
+    if claims is None:
+        raise _credentials_exception()
+    return _user_from_claims(payload, claims)
 
 
 async def get_current_user_optional(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Optional[User]:
-    """Получение текущего пользователя из JWT токена (опционально, не требует токена)."""
+    """
+    Получение текущего пользователя из JWT токена (опционально, не требует токена).
+
+    Невалидный токен даёт None без построения HTTPException и без запроса к БД.
+    """
     if not credentials:
         return None
     
-    try:
-        return await get_current_user(credentials, db)
-    except HTTPException:
+    claims = _decode_token_claims(credentials.credentials)
+    if claims is None:
         return None
+    return await _load_user(claims[0], db)
+
+
+async def get_current_user_from_token_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Optional[User]:
+    """Пользователь из claims JWT (опционально, не требует токена и запроса к БД)."""
+    if not credentials:
+        return None
+    
+    payload = _verify_token(credentials.credentials)
+    claims = _decode_token_claims(credentials.credentials) if payload is not None else None
+    if claims is None:
+        return None
+    if payload.get("v") != TOKEN_SCHEMA_VERSION:
+        return await _load_user(claims[0], db)
+    return _user_from_claims(payload, claims)
 
 
 def get_user_interests_from_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> List[str]:
     """Получение интересов пользователя из JWT токена."""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        interests: List[str] = payload.get("interests", [])
-        return interests
-    except JWTError:
+    payload = _verify_token(credentials.credentials)
+    if payload is None:
         return []
+    interests: List[str] = payload.get("interests", [])
+    return interests
 
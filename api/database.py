@@ -2,10 +2,13 @@
 Инициализация MongoDB клиента для FastAPI приложения.
 """
 
+import logging
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 # Глобальный клиент MongoDB
 mongodb_client: Optional[AsyncIOMotorClient] = None
 database = None
@@ -18,15 +21,29 @@ async def connect_to_mongo():
     mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     db_name = os.getenv("MONGODB_DB_NAME", "events_db")
     
-    mongodb_client = AsyncIOMotorClient(mongodb_uri)
+    # minPoolSize держит прогретые соединения, чтобы первые запросы не ждали handshake
+    client_options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "10")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    }
+    # Сжатие трафика: драйвер и сервер выбирают первый общий алгоритм из списка.
+    # zlib встроен, zstd требует пакета zstandard; пустое значение отключает сжатие
+    compressors = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+    if compressors:
+        client_options["compressors"] = compressors
+        if "zlib" in compressors:
+            client_options["zlibCompressionLevel"] = int(os.getenv("MONGO_ZLIB_COMPRESSION_LEVEL", "-1"))
+    
+    mongodb_client = AsyncIOMotorClient(mongodb_uri, **client_options)
     database = mongodb_client[db_name]
     
     # Проверка подключения
     try:
         await mongodb_client.admin.command('ping')
-        print(f"✅ Подключение к MongoDB успешно: {db_name}")
+        logger.info("Подключение к MongoDB успешно: %s", db_name)
     except Exception as e:
-        print(f"❌ Ошибка подключения к MongoDB: {e}")
+        logger.error("Ошибка подключения к MongoDB: %s", e)
         raise
 
 
@@ -36,7 +53,7 @@ async def close_mongo_connection():
     
     if mongodb_client:
         mongodb_client.close()
-        print("MongoDB соединение закрыто")
+        logger.info("MongoDB соединение закрыто")
 
 
 def get_database():
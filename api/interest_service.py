@@ -2,8 +2,15 @@
 Сервис для обновления интересов пользователя на основе действий.
 """
 
-from typing import Dict, Optional
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from bson import ObjectId
+from bson.errors import InvalidId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from api.auth import invalidate_user_cache
 from api.models import Event
 
 
@@ -14,10 +21,16 @@ ACTION_WEIGHTS = {
     "participate": 2.0
 }
 
+# Метка документов like/dislike в user_actions: по ней построен частичный
+# уникальный индекс reaction_unique (не больше одной реакции на мероприятие)
+REACTION_KIND = "reaction"
+
 # Порог для включения интереса в список
 INTEREST_THRESHOLD = 0.5
 # Коэффициент влияния категорий относительно explicit interests
 CATEGORY_SIGNAL_WEIGHT = 0.35
+# Попытки условной записи interest_scores для тегов с '.' или '$'
+INTEREST_UPDATE_MAX_ATTEMPTS = 5
 
 
 def build_event_tag_weights(event: Event) -> Dict[str, float]:
@@ -77,8 +90,150 @@ def apply_action_delta(
     return updated
 
 
+async def _apply_interest_delta(
+    user_id: Union[str, ObjectId],
+    tag_weights: Dict[str, float],
+    action_weight: float,
+    db: AsyncIOMotorDatabase
+) -> Dict[str, float]:
+    """
+    Атомарное применение дельты к interest_scores пользователя.
+    
+    Один find_one_and_update с pipeline-обновлением: MongoDB прибавляет
+    дельты к interest_scores и сам пересчитывает interests по порогу,
+    поэтому словарь интересов не гоняется в Python и обратно.
+    
+    Args:
+        user_id: ID пользователя (строка или ObjectId)
+        tag_weights: Веса тегов события
+        action_weight: Вес действия (отрицательный для отмены)
+        db: База данных
+        
+    Returns:
+        Обновленный словарь interest_scores (пустой, если дельта нулевая)
+    """
+    if isinstance(user_id, ObjectId):
+        user_oid = user_id
+    else:
+        try:
+            user_oid = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            raise ValueError(f"Неверный формат ID пользователя: {user_id}")
+    projection = {"interest_scores": 1}
+    
+    deltas = {
+        tag: action_weight * tag_weight
+        for tag, tag_weight in tag_weights.items()
+        if tag
+    } if action_weight else {}
+    # Нулевая дельта (неизвестное действие, отмена like->like) не требует запросов к БД
+    if not deltas:
+        return {}
+    
+    # Теги с '.' или '$' нельзя адресовать путём поля — считаем в Python
+    # с оптимистичной блокировкой: запись проходит, только если interest_scores
+    # не изменились после чтения, иначе чтение и пересчет повторяются
+    if any("." in tag or tag.startswith("$") for tag in deltas):
+        interest_scores = await _apply_interest_delta_optimistic(
+            user_oid, tag_weights, action_weight, db
+        )
+    else:
+        user_data = await db.users.find_one_and_update(
+            {"_id": user_oid},
+            _build_interest_update_pipeline(deltas),
+            projection=projection,
+            return_document=ReturnDocument.AFTER
+        )
+        if not user_data:
+            raise ValueError(f"Пользователь {user_oid} не найден")
+        interest_scores = user_data.get("interest_scores", {})
+    
+    invalidate_user_cache(str(user_oid))
+    
+    return interest_scores
+
+
+async def _apply_interest_delta_optimistic(
+    user_oid: ObjectId,
+    tag_weights: Dict[str, float],
+    action_weight: float,
+    db: AsyncIOMotorDatabase
+) -> Dict[str, float]:
+    """
+    Применение дельты через чтение и условную запись (compare-and-set).
+    
+    Args:
+        user_oid: ObjectId пользователя
+        tag_weights: Веса тегов события
+        action_weight: Вес действия (отрицательный для отмены)
+        db: База данных
+        
+    Returns:
+        Обновленный словарь interest_scores
+    """
+    for _ in range(INTEREST_UPDATE_MAX_ATTEMPTS):
+        user_data = await db.users.find_one({"_id": user_oid}, {"interest_scores": 1})
+        if not user_data:
+            raise ValueError(f"Пользователь {user_oid} не найден")
+        current_scores = user_data.get("interest_scores")
+        interest_scores = apply_action_delta(current_scores or {}, tag_weights, action_weight)
+        interests = [
+            tag for tag, score in interest_scores.items()
+            if score > INTEREST_THRESHOLD
+        ]
+        # Поддокумент сравнивается целиком (как прочитан, с порядком ключей);
+        # отсутствующее поле совпадает с фильтром None
+        result = await db.users.update_one(
+            {"_id": user_oid, "interest_scores": current_scores},
+            {"$set": {"interest_scores": interest_scores, "interests": interests}}
+        )
+        if result.matched_count:
+            return interest_scores
+    raise RuntimeError(
+        f"Не удалось обновить интересы пользователя {user_oid}: "
+        f"конкурентные изменения ({INTEREST_UPDATE_MAX_ATTEMPTS} попыток)"
+    )
+
+
+def _build_interest_update_pipeline(deltas: Dict[str, float]) -> List[Dict[str, Any]]:
+    """
+    Pipeline-обновление: прибавление дельт и пересчет interests по порогу.
+    
+    Args:
+        deltas: Дельта interest_score для каждого тега
+        
+    Returns:
+        Стадии pipeline для update
+    """
+    return [
+        {
+            "$set": {
+                f"interest_scores.{tag}": {
+                    "$add": [{"$ifNull": [f"$interest_scores.{tag}", 0]}, delta]
+                }
+                for tag, delta in deltas.items()
+            }
+        },
+        {
+            "$set": {
+                "interests": {
+                    "$map": {
+                        "input": {
+                            "$filter": {
+                                "input": {"$objectToArray": "$interest_scores"},
+                                "cond": {"$gt": ["$$this.v", INTEREST_THRESHOLD]}
+                            }
+                        },
+                        "in": "$$this.k"
+                    }
+                }
+            }
+        }
+    ]
+
+
 async def update_user_interests(
-    user_id: str,
+    user_id: Union[str, ObjectId],
     event: Event,
     action: str,
     db: AsyncIOMotorDatabase
@@ -87,48 +242,53 @@ async def update_user_interests(
     Обновление interest_scores пользователя на основе действия.
     
     Args:
-        user_id: ID пользователя
+        user_id: ID пользователя (строка или ObjectId)
         event: Объект мероприятия
         action: Действие (like, dislike, participate)
         
     Returns:
         Обновленный словарь interest_scores
     """
-    from bson import ObjectId
-    
-    # Получение текущих interest_scores пользователя
-    if not ObjectId.is_valid(user_id):
-        raise ValueError(f"Неверный формат ID пользователя: {user_id}")
-    
-    user_data = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user_data:
-        raise ValueError(f"Пользователь {user_id} не найден")
-    
-    interest_scores: Dict[str, float] = user_data.get("interest_scores", {})
-    
     # Взвешенное обновление интересов
     weight = ACTION_WEIGHTS.get(action, 0.0)
+    if not weight:
+        return {}
     tag_weights = build_event_tag_weights(event)
-    interest_scores = apply_action_delta(interest_scores, tag_weights, weight)
-    
-    # Пересчет interests на основе порога
-    interests = [
-        tag for tag, score in interest_scores.items()
-        if score > INTEREST_THRESHOLD
-    ]
+    return await _apply_interest_delta(user_id, tag_weights, weight, db)
+
+
+async def update_user_interests_bulk(
+    user_id: Union[str, ObjectId],
+    events_actions: List[Tuple[Event, str]],
+    db: AsyncIOMotorDatabase
+) -> Dict[str, float]:
+    """
+    Обновление interest_scores по серии действий одним запросом.
     
-    # Обновление в БД
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {
-            "$set": {
-                "interest_scores": interest_scores,
-                "interests": interests
-            }
-        }
-    )
+    Дельты всех пар (мероприятие, действие) суммируются по тегам
+    и применяются одним pipeline-обновлением.
     
-    return interest_scores
+    Args:
+        user_id: ID пользователя (строка или ObjectId)
+        events_actions: Список пар (мероприятие, действие)
+        
+    Returns:
+        Обновленный словарь interest_scores
+    """
+    combined: Dict[str, float] = defaultdict(float)
+    # Веса тегов считаются один раз на мероприятие, даже если действий по нему несколько
+    tag_weights_by_event: Dict[str, Dict[str, float]] = {}
+    for event, action in events_actions:
+        weight = ACTION_WEIGHTS.get(action, 0.0)
+        if not weight:
+            continue
+        tag_weights = tag_weights_by_event.get(event.id)
+        if tag_weights is None:
+            tag_weights = build_event_tag_weights(event)
+            tag_weights_by_event[event.id] = tag_weights
+        for tag, tag_weight in tag_weights.items():
+            combined[tag] += weight * tag_weight
+    return await _apply_interest_delta(user_id, dict(combined), 1.0, db)
 
 
 async def check_user_action_exists(
@@ -148,13 +308,13 @@ async def check_user_action_exists(
     Returns:
         True если действие уже существует
     """
-    existing_action = await db.user_actions.find_one({
-        "user_id": user_id,
-        "event_id": event_id,
-        "action": action
-    })
+    # Только проверка наличия: limit=1 по индексу, документ не загружается
+    count = await db.user_actions.count_documents(
+        {"user_id": user_id, "event_id": event_id, "action": action},
+        limit=1
+    )
     
-    return existing_action is not None
+    return count > 0
 
 
 async def get_user_action(
@@ -172,11 +332,14 @@ async def get_user_action(
     Returns:
         Действие ("like", "dislike") или None если действия нет
     """
-    action_data = await db.user_actions.find_one({
-        "user_id": user_id,
-        "event_id": event_id,
-        "action": {"$in": ["like", "dislike"]}
-    })
+    action_data = await db.user_actions.find_one(
+        {
+            "user_id": user_id,
+            "event_id": event_id,
+            "action": {"$in": ["like", "dislike"]}
+        },
+        {"action": 1, "_id": 0}
+    )
     
     return action_data.get("action") if action_data else None
 
@@ -207,8 +370,54 @@ async def remove_user_action(
     return result.deleted_count > 0
 
 
-async def update_user_interests_with_reversal(
+async def replace_user_reaction(
     user_id: str,
+    event_id: str,
+    new_action: str,
+    old_action: Optional[str],
+    db: AsyncIOMotorDatabase
+) -> Tuple[bool, bool]:
+    """
+    Замена реакции пользователя (like/dislike) одной атомарной операцией.
+    
+    Смена лайка на дизлайк (и обратно) — update_one существующего документа:
+    если параллельный запрос уже изменил реакцию, документ не найден и ничего
+    не меняется. Первая реакция — insert_one, дубль отсекает индекс
+    reaction_unique по (event_id, user_id) среди документов kind=reaction.
+    
+    Args:
+        user_id: ID пользователя
+        event_id: ID мероприятия
+        new_action: Новое действие
+        old_action: Заменяемое действие или None
+    
+    Returns:
+        (старая реакция снята этим вызовом, новая реакция записана этим вызовом)
+    """
+    now = datetime.utcnow()
+    if old_action:
+        result = await db.user_actions.update_one(
+            {"user_id": user_id, "event_id": event_id, "action": old_action},
+            {"$set": {"action": new_action, "kind": REACTION_KIND, "created_at": now}}
+        )
+        replaced = result.modified_count > 0
+        return replaced, replaced
+    
+    try:
+        await db.user_actions.insert_one({
+            "user_id": user_id,
+            "event_id": event_id,
+            "action": new_action,
+            "kind": REACTION_KIND,
+            "created_at": now
+        })
+    except DuplicateKeyError:
+        return False, False
+    return False, True
+
+
+async def update_user_interests_with_reversal(
+    user_id: Union[str, ObjectId],
     event: Event,
     new_action: str,
     old_action: Optional[str],
@@ -219,7 +428,7 @@ async def update_user_interests_with_reversal(
     Сначала отменяет старое действие, затем применяет новое.
     
     Args:
-        user_id: ID пользователя
+        user_id: ID пользователя (строка или ObjectId)
         event: Объект мероприятия
         new_action: Новое действие (like, dislike)
         old_action: Старое действие (like, dislike) или None
@@ -227,51 +436,18 @@ async def update_user_interests_with_reversal(
     Returns:
         Обновленный словарь interest_scores
     """
-    from bson import ObjectId
-    
-    # Получение текущих interest_scores пользователя
-    if not ObjectId.is_valid(user_id):
-        raise ValueError(f"Неверный формат ID пользователя: {user_id}")
-    
-    user_data = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user_data:
-        raise ValueError(f"Пользователь {user_id} не найден")
-    
-    interest_scores: Dict[str, float] = user_data.get("interest_scores", {})
-    
     tag_weights = build_event_tag_weights(event)
 
-    # Сначала отменяем старое действие (если есть)
+    # Отмена старого действия и применение нового — одна суммарная дельта
+    delta_weight = ACTION_WEIGHTS.get(new_action, 0.0)
     if old_action and old_action in ACTION_WEIGHTS:
-        old_weight = ACTION_WEIGHTS[old_action]
-        interest_scores = apply_action_delta(interest_scores, tag_weights, -old_weight)
-    
-    # Затем применяем новое действие
-    new_weight = ACTION_WEIGHTS.get(new_action, 0.0)
-    interest_scores = apply_action_delta(interest_scores, tag_weights, new_weight)
-    
-    # Пересчет interests на основе порога
-    interests = [
-        tag for tag, score in interest_scores.items()
-        if score > INTEREST_THRESHOLD
-    ]
+        delta_weight -= ACTION_WEIGHTS[old_action]
     
-    # Обновление в БД
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {
-            "$set": {
-                "interest_scores": interest_scores,
-                "interests": interests
-            }
-        }
-    )
-    
-    return interest_scores
+    return await _apply_interest_delta(user_id, tag_weights, delta_weight, db)
 
 
 async def cancel_user_action_effect(
-    user_id: str,
+    user_id: Union[str, ObjectId],
     event: Event,
     action: str,
     db: AsyncIOMotorDatabase
@@ -280,48 +456,18 @@ async def cancel_user_action_effect(
     Отмена эффекта действия пользователя (обратный пересчет интересов).
     
     Args:
-        user_id: ID пользователя
+        user_id: ID пользователя (строка или ObjectId)
         event: Объект мероприятия
         action: Действие для отмены (like, dislike, participate)
         
     Returns:
         Обновленный словарь interest_scores
     """
-    from bson import ObjectId
-    
-    # Получение текущих interest_scores пользователя
-    if not ObjectId.is_valid(user_id):
-        raise ValueError(f"Неверный формат ID пользователя: {user_id}")
-    
-    user_data = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user_data:
-        raise ValueError(f"Пользователь {user_id} не найден")
-    
-    interest_scores: Dict[str, float] = user_data.get("interest_scores", {})
-    
     # Вес действия (отрицательный для отмены)
     weight = ACTION_WEIGHTS.get(action, 0.0)
+    if not weight:
+        return {}
     
     tag_weights = build_event_tag_weights(event)
     # Вычитаем эффект действия
-    interest_scores = apply_action_delta(interest_scores, tag_weights, -weight)
-    
-    # Пересчет interests на основе порога
-    interests = [
-        tag for tag, score in interest_scores.items()
-        if score > INTEREST_THRESHOLD
-    ]
-    
-    # Обновление в БД
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {
-            "$set": {
-                "interest_scores": interest_scores,
-                "interests": interests
-            }
-        }
-    )
-    
-    return interest_scores
-
+    return await _apply_interest_delta(user_id, tag_weights, -weight, db)
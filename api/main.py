@@ -2,16 +2,25 @@
 FastAPI приложение для MVP-сервиса мероприятий.
 """
 
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, status, Depends, Query
+from fastapi import BackgroundTasks, FastAPI, HTTPException, status, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import TypeAdapter
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from openai import AsyncOpenAI
 from qdrant_client import QdrantClient
 from bson import ObjectId
+from bson.errors import InvalidId
 import base64
 from api.database import connect_to_mongo, close_mongo_connection, get_database
 from api.models import (
@@ -21,24 +30,133 @@ from api.models import (
 )
 from api.auth import (
     create_user, authenticate_user, create_access_token,
-    get_current_user, get_current_user_optional, get_user_interests_from_token
+    get_current_user, get_current_user_from_token, get_current_user_optional,
+    get_current_user_from_token_optional, get_user_interests_from_token
 )
 from api.interest_service import (
     update_user_interests, 
-    check_user_action_exists,
     get_user_action,
     remove_user_action,
+    replace_user_reaction,
+    REACTION_KIND,
     update_user_interests_with_reversal,
     cancel_user_action_effect
 )
 from api.models import User
+from src.common.event_dates import EVENT_DATE_EXPR
 from src.event_extraction.config import EventExtractionConfig
 from src.event_extraction.normalization import TagNormalizer
 
+logger = logging.getLogger(__name__)
+
+
+# ===== Lifecycle =====
+
+async def _ensure_event_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Индексы коллекции events (одной командой createIndexes)."""
+    await db.events.create_indexes([
+        # Индекс для курсорной пагинации событий
+        IndexModel([("date", -1), ("_id", -1)]),
+        # Индекс для обратной сортировки (asc)
+        IndexModel([("date", 1), ("_id", 1)]),
+        IndexModel([("schedule.date_start", -1), ("_id", -1)]),
+        IndexModel([("schedule.date_start", 1), ("_id", 1)]),
+        IndexModel([("canonical_hash", 1)]),
+        # Фильтры /events стоят в первом $match (до вычисления _event_date), поэтому
+        # multikey-индексы по категориям и индекс по цене сужают выборку до IXSCAN
+        IndexModel([("category_ids", 1)]),
+        IndexModel([("categories", 1)]),
+        IndexModel([("price.amount", 1)]),
+        # Нативная дата события (event_date) для предфильтра по датам в /events
+        IndexModel([("event_date", -1), ("_id", -1)]),
+        # Все ветки $or предфильтра должны быть индексированы, иначе планировщик выберет COLLSCAN
+        IndexModel([("schedule.type", 1)]),
+        # Текстовый индекс для поиска по title
+        IndexModel([("title", "text")], name="title_text_index"),
+    ])
+
+
+async def _ensure_user_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Индексы коллекций users и user_actions."""
+    global _participation_unique_index
+    # Уникальный индекс для nickname пользователей
+    await db.users.create_index("nickname", unique=True)
+    # Действия пользователя: проверки по (user_id, event_id, action) и выборка
+    # действий для страницы событий по префиксу (user_id, event_id)
+    await db.user_actions.create_index([("user_id", 1), ("event_id", 1), ("action", 1)])
+    # Повторное участие отсекает уникальный частичный индекс: participate_event
+    # просто вставляет действие и ловит DuplicateKeyError вместо find_one перед вставкой
+    try:
+        await db.user_actions.create_index(
+            [("user_id", 1), ("event_id", 1)],
+            unique=True,
+            partialFilterExpression={"action": "participate"},
+            name="participate_unique"
+        )
+        _participation_unique_index = True
+    except OperationFailure as e:
+        # В коллекции уже есть дубли участия — остаёмся на проверке через find_one
+        _participation_unique_index = False
+        logger.warning("Не удалось создать уникальный индекс участия: %s", e)
+    # Не больше одной реакции (like/dislike) пользователя на мероприятие: параллельная
+    # первая реакция получает DuplicateKeyError и превращается в 409. $in в
+    # partialFilterExpression есть только с MongoDB 6.0, поэтому реакции помечены kind
+    try:
+        await db.user_actions.create_index(
+            [("event_id", 1), ("user_id", 1)],
+            unique=True,
+            partialFilterExpression={"kind": REACTION_KIND},
+            name="reaction_unique"
+        )
+    except OperationFailure as e:
+        # В коллекции уже есть дубли реакций — параллельные лайки не отсекаются
+        logger.warning("Не удалось создать уникальный индекс реакций: %s", e)
+
+
+def _build_tag_normalizer() -> Optional[TagNormalizer]:
+    """Нормализатор тегов для фильтрации категорий через канонические ID."""
+    try:
+        llm_keys = EventExtractionConfig.get_api_keys()
+        llm_client = None
+        if llm_keys:
+            llm_client = AsyncOpenAI(
+                base_url=EventExtractionConfig.LLM_BASE_URL,
+                api_key=llm_keys[0],
+            )
+        qdrant_client = QdrantClient(
+            host=EventExtractionConfig.QDRANT_HOST,
+            port=EventExtractionConfig.QDRANT_PORT,
+            api_key=EventExtractionConfig.QDRANT_API_KEY or None,
+        )
+        return TagNormalizer(
+            llm_client=llm_client,
+            model_name=EventExtractionConfig.LLM_MODEL_NAME,
+            qdrant_client=qdrant_client,
+            vector_size=EventExtractionConfig.QDRANT_VECTOR_SIZE,
+        )
+    except Exception:
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Инициализация при запуске и очистка при завершении."""
+    await connect_to_mongo()
+    db = get_database()
+    # Индексы разных коллекций создаются параллельно
+    await asyncio.gather(_ensure_event_indexes(db), _ensure_user_indexes(db))
+    app.state.tag_normalizer = _build_tag_normalizer()
+    try:
+        yield
+    finally:
+        await close_mongo_connection()
+
+
 app = FastAPI(
     title="Events API",
     description="MVP-сервис мероприятий",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -46,8 +164,11 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Явные списки вместо "*": API использует только эти методы и заголовки,
+    # а max_age позволяет браузеру кэшировать preflight на сутки
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
 # Раздача статических файлов (изображения)
@@ -58,8 +179,42 @@ images_dir.mkdir(exist_ok=True)  # Создаем папку, если её не
 app.mount("/images", StaticFiles(directory=str(images_dir)), name="images")
 
 
+# Кэш списка категорий: distinct по всей коллекции events дорогой,
+# а новые категории появляются только после обработки постов
+CATEGORIES_CACHE_TTL_SECONDS = 60.0
+_categories_cache: Tuple[Optional[List[str]], float] = (None, 0.0)
+# Идущий сейчас distinct: параллельные запросы после истечения TTL ждут его,
+# а не запускают каждый свой обход коллекции
+_categories_inflight: Optional["asyncio.Task[List[str]]"] = None
+
+# Создан ли уникальный индекс участия (user_actions.participate_unique)
+_participation_unique_index = False
+
+# Пакетная валидация страницы событий
+_EVENT_RESPONSE_LIST_ADAPTER = TypeAdapter(List[EventResponse])
+
+
 # ===== Helper functions =====
 
+def parse_event_oid(event_id: str) -> ObjectId:
+    """
+    Разбор ID мероприятия в ObjectId за один проход (без отдельного is_valid).
+
+    Args:
+        event_id: ID мероприятия из пути запроса
+
+    Returns:
+        ObjectId мероприятия; 400 при неверном формате
+    """
+    try:
+        return ObjectId(event_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неверный формат ID мероприятия"
+        )
+
+
 async def enrich_events_with_user_actions(
     events: List[EventResponse],
     user_id: Optional[str],
@@ -71,10 +226,13 @@ async def enrich_events_with_user_actions(
     
     # Получаем все действия пользователя за один запрос
     event_ids = [event.id for event in events]
-    user_actions_cursor = db.user_actions.find({
-        "user_id": user_id,
-        "event_id": {"$in": event_ids}
-    })
+    user_actions_cursor = db.user_actions.find(
+        {
+            "user_id": user_id,
+            "event_id": {"$in": event_ids}
+        },
+        {"event_id": 1, "action": 1, "_id": 0}
+    )
     
     # Создаем словарь event_id -> список действий
     actions_map = {}
@@ -175,61 +333,6 @@ def _normalize_event_document(event_data: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
-# ===== Lifecycle events =====
-
-@app.on_event("startup")
-async def startup_event():
-    """Инициализация при запуске."""
-    await connect_to_mongo()
-    
-    # Создание индексов
-    db = get_database()
-    # Индекс для курсорной пагинации событий
-    await db.events.create_index([("date", -1), ("_id", -1)])
-    # Индекс для обратной сортировки (asc)
-    await db.events.create_index([("date", 1), ("_id", 1)])
-    await db.events.create_index([("schedule.date_start", -1), ("_id", -1)])
-    await db.events.create_index([("schedule.date_start", 1), ("_id", 1)])
-    await db.events.create_index([("canonical_hash", 1)])
-    # Текстовый индекс для поиска по title
-    await db.events.create_index(
-        [("title", "text")],
-        name="title_text_index"
-    )
-    # Уникальный индекс для nickname пользователей
-    await db.users.create_index("nickname", unique=True)
-
-    # Инициализация нормализатора тегов для фильтрации категорий через канонические ID.
-    app.state.tag_normalizer = None
-    try:
-        llm_keys = EventExtractionConfig.get_api_keys()
-        llm_client = None
-        if llm_keys:
-            llm_client = AsyncOpenAI(
-                base_url=EventExtractionConfig.LLM_BASE_URL,
-                api_key=llm_keys[0],
-            )
-        qdrant_client = QdrantClient(
-            host=EventExtractionConfig.QDRANT_HOST,
-            port=EventExtractionConfig.QDRANT_PORT,
-            api_key=EventExtractionConfig.QDRANT_API_KEY or None,
-        )
-        app.state.tag_normalizer = TagNormalizer(
-            llm_client=llm_client,
-            model_name=EventExtractionConfig.LLM_MODEL_NAME,
-            qdrant_client=qdrant_client,
-            vector_size=EventExtractionConfig.QDRANT_VECTOR_SIZE,
-        )
-    except Exception:
-        app.state.tag_normalizer = None
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Очистка при завершении."""
-    await close_mongo_connection()
-
-
 # ===== Авторизация =====
 
 @app.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -272,6 +375,7 @@ async def login(user_data: UserLogin, db: AsyncIOMotorDatabase = Depends(get_dat
         data={
             "sub": str(user.id),
             "nickname": user.nickname,
+            "name": user.name,
             "interests": user.interests
         }
     )
@@ -374,8 +478,6 @@ async def get_events(
             decoded = base64.urlsafe_b64decode(cursor).decode('utf-8')
             cursor_date_str, cursor_id_str = decoded.split('|')
             cursor_date = datetime.fromisoformat(cursor_date_str)
-            if not ObjectId.is_valid(cursor_id_str):
-                raise ValueError("Invalid ObjectId in cursor")
             cursor_id = ObjectId(cursor_id_str)
         except Exception as e:
             raise HTTPException(
@@ -383,39 +485,51 @@ async def get_events(
                 detail=f"Неверный формат курсора: {str(e)}"
             )
     
-    # Стадии агрегации: нормализуем дату события в поле _event_date
-    event_date_expr: Dict[str, Any] = {
-        "$ifNull": [
-            {"$convert": {"input": "$date", "to": "date", "onError": None, "onNull": None}},
-            {
-                "$ifNull": [
-                    {"$convert": {"input": "$schedule.date_start", "to": "date", "onError": None, "onNull": None}},
-                    {
-                        "$ifNull": [
-                            {"$convert": {"input": "$schedule.valid_from", "to": "date", "onError": None, "onNull": None}},
-                            {
-                                "$ifNull": [
-                                    {"$convert": {"input": "$schedule.approximate_start", "to": "date", "onError": None, "onNull": None}},
-                                    {
-                                        "$ifNull": [
-                                            {"$convert": {"input": "$processed_at", "to": "date", "onError": None, "onNull": None}},
-                                            {"$toDate": "$_id"}
-                                        ]
-                                    }
-                                ]
-                            }
-                        ]
-                    }
-                ]
-            }
-        ]
-    }
+    # Предфильтр по сохранённому event_date (индекс events.event_date) до вычисления
+    # _event_date; документы без event_date (до миграции) пропускаются к точной проверке
+    if event_date_filter:
+        date_prefilter: Optional[Dict[str, Any]] = {
+            "$or": [{"event_date": event_date_filter}, {"event_date": None}]
+        }
+    elif apply_default_upcoming_filter:
+        date_prefilter = {
+            "$or": [
+                {"event_date": {"$gte": current_day_start}},
+                {"event_date": None},
+                {"schedule.type": {"$in": ["recurring_weekly", "fuzzy"]}},
+            ]
+        }
+    else:
+        date_prefilter = None
+
+    # Граница курсора по сохранённому event_date: у таких документов _event_date
+    # совпадает с event_date, поэтому кортежное условие (event_date, _id) точное
+    # и идёт по индексу (event_date, _id); документы без event_date проверяются ниже
+    cursor_prefilter: Optional[Dict[str, Any]] = None
+    if cursor_date and cursor_id:
+        op = "$lt" if sort_direction == -1 else "$gt"
+        cursor_prefilter = {
+            "$or": [
+                {"event_date": {op: cursor_date}},
+                {"event_date": cursor_date, "_id": {op: cursor_id}},
+                {"event_date": None},
+            ]
+        }
+
+    for prefilter in (date_prefilter, cursor_prefilter):
+        if not prefilter:
+            continue
+        if base_filter_query:
+            base_filter_query = {"$and": [base_filter_query, prefilter]}
+        else:
+            base_filter_query = prefilter
 
     pipeline: List[Dict[str, Any]] = []
     if base_filter_query:
         pipeline.append({"$match": base_filter_query})
 
-    pipeline.append({"$addFields": {"_event_date": event_date_expr}})
+    # Нормализуем дату события в поле _event_date
+    pipeline.append({"$addFields": {"_event_date": EVENT_DATE_EXPR}})
 
     if event_date_filter:
         pipeline.append({"$match": {"_event_date": event_date_filter}})
@@ -451,12 +565,39 @@ async def get_events(
         {"$limit": limit + 1}
     ])
 
-    mongo_cursor = db.events.aggregate(pipeline)
+    # Действия пользователя подтягиваются той же агрегацией: $lookup идёт уже
+    # по странице и использует индекс user_actions (user_id, event_id, ...)
+    if current_user:
+        pipeline.extend([
+            {"$lookup": {
+                "from": "user_actions",
+                "let": {"event_id": {"$toString": "$_id"}},
+                "pipeline": [
+                    {"$match": {
+                        "user_id": str(current_user.id),
+                        "$expr": {"$eq": ["$event_id", "$$event_id"]}
+                    }},
+                    {"$project": {"action": 1, "_id": 0}}
+                ],
+                "as": "user_actions"
+            }},
+            {"$addFields": {"user_actions": "$user_actions.action"}}
+        ])
+
+    # Вся страница (limit + 1 документ) приходит первым батчем: без getMore
+    # и без поштучной итерации курсора
+    mongo_cursor = db.events.aggregate(pipeline, batchSize=limit + 1)
+    page_docs = await mongo_cursor.to_list(length=limit + 1)
+    
+    # Проверка наличия следующей страницы; лишний документ не валидируется
+    has_more = len(page_docs) > limit
+    if has_more:
+        page_docs = page_docs[:limit]
     
     # Сбор данных в исходном порядке
     raw_events = []  # Для генерации курсоров (исходный порядок)
-    events = []      # Для отображения (будет пересортирован при необходимости)
-    async for event_data in mongo_cursor:
+    event_docs = []  # Документы страницы для пакетной валидации
+    for event_data in page_docs:
         # Сохраняем исходные данные для курсора
         raw_events.append({
             "_event_date": event_data.get("_event_date"),
@@ -466,17 +607,12 @@ async def get_events(
         event_data.pop("_event_date", None)
         event_data = _normalize_event_document(event_data)
 
-        # Преобразуем в EventResponse
         event_data["id"] = str(event_data.pop("_id"))
-        if "processed_at" in event_data and isinstance(event_data["processed_at"], datetime):
-            event_data["processed_at"] = event_data["processed_at"].isoformat()
-        events.append(EventResponse(**event_data))
+        event_docs.append(event_data)
     
-    # Проверка наличия следующей страницы
-    has_more = len(events) > limit
-    if has_more:
-        events = events[:limit]
-        raw_events = raw_events[:limit]  # Только для курсора — порядок сохранён
+    # Вся страница преобразуется в EventResponse одним вызовом pydantic-core
+    # (для отображения, будет пересортирована при необходимости)
+    events = _EVENT_RESPONSE_LIST_ADAPTER.validate_python(event_docs)
     
     # === РАНЖИРОВАНИЕ ПО РЕЛЕВАНТНОСТИ (только внутри текущей страницы) ===
     if for_my_interests and user_scores and events:
@@ -506,10 +642,6 @@ async def get_events(
         )
         # ⚠️ raw_events НЕ трогаем — он нужен для курсоров в исходном порядке
     
-    # Добавляем информацию о действиях пользователя
-    if current_user:
-        events = await enrich_events_with_user_actions(events, str(current_user.id), db)
-    
     # === ГЕНЕРАЦИЯ КУРСОРОВ (по исходному порядку из raw_events) ===
     next_cursor = None
     if has_more and raw_events:
@@ -533,17 +665,11 @@ async def get_events(
 @app.get("/events/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: str,
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[User] = Depends(get_current_user_from_token_optional),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Получение деталей мероприятия из коллекции events."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
-    
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
+    event_data = await db.events.find_one({"_id": parse_event_oid(event_id)})
     
     if not event_data:
         raise HTTPException(
@@ -555,11 +681,9 @@ async def get_event(
 
     # Переименовываем _id в id для корректной сериализации
     event_data["id"] = str(event_data.pop("_id"))
-    # Преобразуем processed_at из datetime в строку, если нужно
-    if "processed_at" in event_data and isinstance(event_data["processed_at"], datetime):
-        event_data["processed_at"] = event_data["processed_at"].isoformat()
-    
-    event_response = EventResponse(**event_data)
+    # processed_at остаётся datetime: поле модели типа datetime, строковый
+    # круг isoformat -> fromisoformat только тратил время на разбор
+    event_response = EventResponse.model_validate(event_data)
     
     # Добавляем информацию о действии пользователя
     if current_user:
@@ -569,11 +693,9 @@ async def get_event(
     return event_response
 
 
-@app.get("/categories", response_model=List[str])
-async def get_categories(
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
-    """Получение уникального списка категорий из всех мероприятий."""
+async def _load_categories(db: AsyncIOMotorDatabase) -> List[str]:
+    """Непустые категории всех мероприятий (отсортированные) с записью в кэш."""
+    global _categories_cache
     # Используем distinct для получения уникальных категорий
     categories = await db.events.distinct("categories")
     
@@ -581,26 +703,91 @@ async def get_categories(
     categories = [cat for cat in categories if cat]
     categories.sort()
     
+    _categories_cache = (categories, time.monotonic())
     return categories
 
 
-# ===== Действия с мероприятиями =====
+def _reset_categories_inflight(task: "asyncio.Task[List[str]]") -> None:
+    """Снимает завершившийся distinct, даже если все ожидавшие запросы отменены."""
+    global _categories_inflight
+    if _categories_inflight is task:
+        _categories_inflight = None
 
-@app.post("/events/{event_id}/like", response_model=MessageResponse)
-async def like_event(
-    event_id: str,
-    current_user: User = Depends(get_current_user),
+
+@app.get("/categories", response_model=List[str])
+async def get_categories(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Лайк мероприятия."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
+    """Получение уникального списка категорий из всех мероприятий."""
+    global _categories_inflight
+    
+    cached_categories, cached_at = _categories_cache
+    if cached_categories is not None and time.monotonic() - cached_at < CATEGORIES_CACHE_TTL_SECONDS:
+        return cached_categories
+    
+    task = _categories_inflight
+    if task is None:
+        task = asyncio.ensure_future(_load_categories(db))
+        task.add_done_callback(_reset_categories_inflight)
+        _categories_inflight = task
+    # shield: отмена одного ожидающего запроса не отменяет общий distinct
+    return await asyncio.shield(task)
+
+
+# ===== Действия с мероприятиями =====
+
+# Поля мероприятия, которые нужны build_event_tag_weights
+_ACTION_EVENT_PROJECTION = {"interests": 1, "user_interests": 1, "categories": 1}
+
+# Кэш теговой части мероприятий для эндпоинтов действий: event_id -> (Event, истекает_в).
+# Теги и категории после обработки поста почти не меняются, TTL ограничивает устаревание
+ACTION_EVENT_CACHE_TTL_SECONDS = 300.0
+ACTION_EVENT_CACHE_MAX_SIZE = 5_000
+_action_event_cache: "OrderedDict[str, Tuple[Event, float]]" = OrderedDict()
+
+
+def _get_cached_action_event(event_id: str) -> Optional[Event]:
+    """Мероприятие из кэша действий или None при промахе/истечении TTL."""
+    cached = _action_event_cache.get(event_id)
+    if cached is None:
+        return None
+    event, expires_at = cached
+    if time.monotonic() >= expires_at:
+        del _action_event_cache[event_id]
+        return None
+    _action_event_cache.move_to_end(event_id)
+    return event
+
+
+def _cache_action_event(event_id: str, event: Event) -> None:
+    """Сохранение мероприятия в кэш действий с вытеснением самых старых записей."""
+    _action_event_cache[event_id] = (event, time.monotonic() + ACTION_EVENT_CACHE_TTL_SECONDS)
+    _action_event_cache.move_to_end(event_id)
+    if len(_action_event_cache) > ACTION_EVENT_CACHE_MAX_SIZE:
+        _action_event_cache.popitem(last=False)
+
+
+async def _load_action_event(event_id: str, db: AsyncIOMotorDatabase) -> Event:
+    """
+    Загрузка мероприятия для эндпоинтов действий.
+
+    Читаются только поля, влияющие на пересчет интересов: описание,
+    изображения и прочие поля документа действиям не нужны. Результат
+    кэшируется в процессе на ACTION_EVENT_CACHE_TTL_SECONDS.
+
+    Args:
+        event_id: ID мероприятия
+        db: База данных
+
+    Returns:
+        Мероприятие с тегами и категориями (400/404 при неверном или неизвестном ID)
+    """
+    # Попадание в кэш означает, что ID уже проверен — разбор ObjectId не нужен
+    event = _get_cached_action_event(event_id)
+    if event is not None:
+        return event
     
-    # Проверка существования мероприятия
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
+    event_data = await db.events.find_one({"_id": parse_event_oid(event_id)}, _ACTION_EVENT_PROJECTION)
     if not event_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -608,39 +795,101 @@ async def like_event(
         )
     
     event = Event(**event_data)
+    _cache_action_event(event_id, event)
+    return event
+
+
+async def _load_action_event_with_reaction(
+    event_id: str,
+    user_id: str,
+    db: AsyncIOMotorDatabase
+) -> Tuple[Event, Optional[str]]:
+    """
+    Загрузка мероприятия и текущей реакции пользователя (like/dislike) одним запросом.
+
+    $lookup с константным фильтром по (user_id, event_id, action) идёт по
+    индексу user_actions, поэтому лайк/дизлайк обходятся одним обращением
+    к MongoDB вместо двух последовательных.
+
+    Args:
+        event_id: ID мероприятия
+        user_id: ID пользователя
+        db: База данных
+
+    Returns:
+        (мероприятие, "like"/"dislike" или None); 400/404 при неверном или неизвестном ID
+    """
+    # Мероприятие уже в кэше — к MongoDB идёт только запрос реакции
+    event = _get_cached_action_event(event_id)
+    if event is not None:
+        return event, await get_user_action(user_id, event_id, db)
+    
+    pipeline = [
+        {"$match": {"_id": parse_event_oid(event_id)}},
+        {"$limit": 1},
+        {"$project": _ACTION_EVENT_PROJECTION},
+        {"$lookup": {
+            "from": "user_actions",
+            "pipeline": [
+                {"$match": {
+                    "user_id": user_id,
+                    "event_id": event_id,
+                    "action": {"$in": ["like", "dislike"]}
+                }},
+                {"$limit": 1},
+                {"$project": {"action": 1, "_id": 0}}
+            ],
+            "as": "reaction"
+        }}
+    ]
+    docs = await db.events.aggregate(pipeline).to_list(length=1)
+    if not docs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Мероприятие не найдено"
+        )
     
+    event_data = docs[0]
+    reaction = event_data.pop("reaction", None)
+    current_action = reaction[0].get("action") if reaction else None
+    event = Event(**event_data)
+    _cache_action_event(event_id, event)
+    return event, current_action
+
+
+@app.post("/events/{event_id}/like", response_model=MessageResponse)
+async def like_event(
+    event_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Лайк мероприятия."""
     user_id_str = str(current_user.id)
     
-    # Проверяем текущее действие
-    current_action = await get_user_action(user_id_str, event_id, db)
+    # Мероприятие и текущее действие пользователя — один запрос
+    event, current_action = await _load_action_event_with_reaction(event_id, user_id_str, db)
     
+    already_reacted = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Вы уже поставили лайк этому мероприятию"
+    )
     # Если уже есть лайк - возвращаем ошибку
     if current_action == "like":
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Вы уже поставили лайк этому мероприятию"
-        )
-    
-    # Если есть дизлайк - удаляем его
-    if current_action == "dislike":
-        await remove_user_action(user_id_str, event_id, "dislike", db)
+        raise already_reacted
     
-    # Сохранение нового действия
-    action_data = {
-        "user_id": user_id_str,
-        "event_id": event_id,
-        "action": "like",
-        "created_at": datetime.utcnow()
-    }
-    await db.user_actions.insert_one(action_data)
-    
-    # Обновление интересов пользователя с учетом переключения
-    await update_user_interests_with_reversal(
-        user_id_str, 
-        event, 
-        "like", 
-        current_action, 
-        db
+    # Замена реакции (дизлайк меняется на лайк); если реакцию успел изменить
+    # параллельный запрос, данные не трогаются и интересы не пересчитываются
+    old_removed, stored = await replace_user_reaction(
+        user_id_str, event_id, "like", current_action, db
+    )
+    if not stored:
+        raise already_reacted
+    # Пересчет интересов ответу не нужен — выполняется после отправки ответа;
+    # старая реакция откатывается, только если её снял именно этот запрос
+    background_tasks.add_task(
+        update_user_interests_with_reversal, user_id_str, event, "like",
+        current_action if old_removed else None, db
     )
     
     message = "Лайк поставлен" if not current_action else "Лайк поставлен (дизлайк отменен)"
@@ -650,58 +899,36 @@ async def like_event(
 @app.post("/events/{event_id}/dislike", response_model=MessageResponse)
 async def dislike_event(
     event_id: str,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Дизлайк мероприятия."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
-    
-    # Проверка существования мероприятия
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
-    if not event_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Мероприятие не найдено"
-        )
-    
-    event = Event(**event_data)
-    
     user_id_str = str(current_user.id)
     
-    # Проверяем текущее действие
-    current_action = await get_user_action(user_id_str, event_id, db)
+    # Мероприятие и текущее действие пользователя — один запрос
+    event, current_action = await _load_action_event_with_reaction(event_id, user_id_str, db)
     
+    already_reacted = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Вы уже поставили дизлайк этому мероприятию"
+    )
     # Если уже есть дизлайк - возвращаем ошибку
     if current_action == "dislike":
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Вы уже поставили дизлайк этому мероприятию"
-        )
+        raise already_reacted
     
-    # Если есть лайк - удаляем его
-    if current_action == "like":
-        await remove_user_action(user_id_str, event_id, "like", db)
-    
-    # Сохранение нового действия
-    action_data = {
-        "user_id": user_id_str,
-        "event_id": event_id,
-        "action": "dislike",
-        "created_at": datetime.utcnow()
-    }
-    await db.user_actions.insert_one(action_data)
-    
-    # Обновление интересов пользователя с учетом переключения
-    await update_user_interests_with_reversal(
-        user_id_str, 
-        event, 
-        "dislike", 
-        current_action, 
-        db
+    # Замена реакции (лайк меняется на дизлайк); если реакцию успел изменить
+    # параллельный запрос, данные не трогаются и интересы не пересчитываются
+    old_removed, stored = await replace_user_reaction(
+        user_id_str, event_id, "dislike", current_action, db
+    )
+    if not stored:
+        raise already_reacted
+    # Пересчет интересов ответу не нужен — выполняется после отправки ответа;
+    # старая реакция откатывается, только если её снял именно этот запрос
+    background_tasks.add_task(
+        update_user_interests_with_reversal, user_id_str, event, "dislike",
+        current_action if old_removed else None, db
     )
     
     message = "Дизлайк поставлен" if not current_action else "Дизлайк поставлен (лайк отменен)"
@@ -711,50 +938,64 @@ async def dislike_event(
 @app.post("/events/{event_id}/participate", response_model=MessageResponse)
 async def participate_event(
     event_id: str,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Участие в мероприятии."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
-    
-    # Проверка существования мероприятия
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
-    if not event_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Мероприятие не найдено"
-        )
-    
-    event = Event(**event_data)
-    
-    # Проверка на повторное участие (можно участвовать несколько раз, но для логики проверим)
-    existing_participation = await db.user_actions.find_one({
-        "user_id": str(current_user.id),
-        "event_id": event_id,
-        "action": "participate"
-    })
-    
-    if existing_participation:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Вы уже зарегистрированы на это мероприятие"
-        )
-    
-    # Сохранение действия
+    already_registered = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Вы уже зарегистрированы на это мероприятие"
+    )
+    user_id_str = str(current_user.id)
     action_data = {
-        "user_id": str(current_user.id),
+        "user_id": user_id_str,
         "event_id": event_id,
         "action": "participate",
         "created_at": datetime.utcnow()
     }
-    await db.user_actions.insert_one(action_data)
     
-    # Обновление интересов пользователя
-    await update_user_interests(str(current_user.id), event, "participate", db)
+    if _participation_unique_index:
+        # Неверный ID отсекается до любых записей
+        parse_event_oid(event_id)
+        event = _get_cached_action_event(event_id)
+        if event is not None:
+            # Дубль отсекает уникальный индекс участия
+            try:
+                await db.user_actions.insert_one(action_data)
+            except DuplicateKeyError:
+                raise already_registered
+        else:
+            # Оптимистично: вставка идёт параллельно с загрузкой мероприятия,
+            # а если мероприятия нет — вставленное действие удаляется
+            event, insert_result = await asyncio.gather(
+                _load_action_event(event_id, db),
+                db.user_actions.insert_one(action_data),
+                return_exceptions=True
+            )
+            if isinstance(event, BaseException):
+                if not isinstance(insert_result, BaseException):
+                    await db.user_actions.delete_one({"_id": insert_result.inserted_id})
+                raise event
+            if isinstance(insert_result, DuplicateKeyError):
+                raise already_registered
+            if isinstance(insert_result, BaseException):
+                raise insert_result
+    else:
+        # Без уникального индекса повторное участие проверяется запросом
+        event, existing_participation = await asyncio.gather(
+            _load_action_event(event_id, db),
+            db.user_actions.find_one(
+                {"user_id": user_id_str, "event_id": event_id, "action": "participate"},
+                {"_id": 1}
+            )
+        )
+        if existing_participation:
+            raise already_registered
+        await db.user_actions.insert_one(action_data)
+    
+    # Интересы обновляются только после успешной вставки, уже после отправки ответа
+    background_tasks.add_task(update_user_interests, user_id_str, event, "participate", db)
     
     return MessageResponse(message="Вы зарегистрированы на мероприятие")
 
@@ -762,39 +1003,25 @@ async def participate_event(
 @app.delete("/events/{event_id}/like", response_model=MessageResponse)
 async def unlike_event(
     event_id: str,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Отмена лайка мероприятия."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
-    
-    # Проверка существования мероприятия
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
-    if not event_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Мероприятие не найдено"
-        )
-    
-    event = Event(**event_data)
     user_id_str = str(current_user.id)
     
-    # Проверяем, есть ли лайк
-    if not await check_user_action_exists(user_id_str, event_id, "like", db):
+    # Сначала мероприятие (обычно из кэша): при 404 действие не удаляется
+    event = await _load_action_event(event_id, db)
+    # deleted_count показывает, было ли действие (один атомарный запрос)
+    removed = await remove_user_action(user_id_str, event_id, "like", db)
+    if not removed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Лайк не найден"
         )
     
-    # Удаление действия
-    await remove_user_action(user_id_str, event_id, "like", db)
-    
-    # Отмена эффекта на интересы пользователя
-    await cancel_user_action_effect(user_id_str, event, "like", db)
+    # Отмена эффекта на интересы пользователя — после отправки ответа
+    background_tasks.add_task(cancel_user_action_effect, user_id_str, event, "like", db)
     
     return MessageResponse(message="Лайк отменен")
 
@@ -802,39 +1029,25 @@ async def unlike_event(
 @app.delete("/events/{event_id}/dislike", response_model=MessageResponse)
 async def undislike_event(
     event_id: str,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Отмена дизлайка мероприятия."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
-    
-    # Проверка существования мероприятия
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
-    if not event_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Мероприятие не найдено"
-        )
-    
-    event = Event(**event_data)
     user_id_str = str(current_user.id)
     
-    # Проверяем, есть ли дизлайк
-    if not await check_user_action_exists(user_id_str, event_id, "dislike", db):
+    # Сначала мероприятие (обычно из кэша): при 404 действие не удаляется
+    event = await _load_action_event(event_id, db)
+    # deleted_count показывает, было ли действие (один атомарный запрос)
+    removed = await remove_user_action(user_id_str, event_id, "dislike", db)
+    if not removed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Дизлайк не найден"
         )
     
-    # Удаление действия
-    await remove_user_action(user_id_str, event_id, "dislike", db)
-    
-    # Отмена эффекта на интересы пользователя
-    await cancel_user_action_effect(user_id_str, event, "dislike", db)
+    # Отмена эффекта на интересы пользователя — после отправки ответа
+    background_tasks.add_task(cancel_user_action_effect, user_id_str, event, "dislike", db)
     
     return MessageResponse(message="Дизлайк отменен")
 
@@ -842,39 +1055,25 @@ async def undislike_event(
 @app.delete("/events/{event_id}/participate", response_model=MessageResponse)
 async def cancel_participation(
     event_id: str,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Отмена участия в мероприятии."""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Неверный формат ID мероприятия"
-        )
-    
-    # Проверка существования мероприятия
-    event_data = await db.events.find_one({"_id": ObjectId(event_id)})
-    if not event_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Мероприятие не найдено"
-        )
-    
-    event = Event(**event_data)
     user_id_str = str(current_user.id)
     
-    # Проверяем, есть ли участие
-    if not await check_user_action_exists(user_id_str, event_id, "participate", db):
+    # Сначала мероприятие (обычно из кэша): при 404 действие не удаляется
+    event = await _load_action_event(event_id, db)
+    # deleted_count показывает, было ли действие (один атомарный запрос)
+    removed = await remove_user_action(user_id_str, event_id, "participate", db)
+    if not removed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Участие не найдено"
         )
     
-    # Удаление действия
-    await remove_user_action(user_id_str, event_id, "participate", db)
-    
-    # Отмена эффекта на интересы пользователя
-    await cancel_user_action_effect(user_id_str, event, "participate", db)
+    # Отмена эффекта на интересы пользователя — после отправки ответа
+    background_tasks.add_task(cancel_user_action_effect, user_id_str, event, "participate", db)
     
     return MessageResponse(message="Участие отменено")
 
@@ -883,8 +1082,14 @@ async def cancel_participation(
 
 @app.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
-    """Получение информации о текущем пользователе."""
-    return UserResponse(
+    """
+    Получение информации о текущем пользователе.
+
+    Пользователь берётся из кэша get_current_user (сбрасывается при изменении
+    интересов), поэтому повторные запросы /me не ходят в MongoDB. Поля User уже
+    проверены, UserResponse собирается без повторной валидации.
+    """
+    return UserResponse.model_construct(
         id=str(current_user.id),
         nickname=current_user.nickname,
         name=current_user.name,
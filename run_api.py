@@ -24,6 +24,8 @@ if __name__ == "__main__":
         host=os.getenv("API_HOST", "0.0.0.0"),
         port=int(os.getenv("API_PORT", "8000")),
         reload=True,
+        # uvloop при наличии, иначе стандартный asyncio
+        loop=os.getenv("API_LOOP", "auto"),
         log_level="info"
     )
 
@@ -5,7 +5,6 @@
 import asyncio
 import logging
 import sys
-from motor.motor_asyncio import AsyncIOMotorClient
 from qdrant_client import QdrantClient
 from openai import AsyncOpenAI
 
@@ -16,6 +15,7 @@ from src.event_extraction import (
     InsufficientQuotaError
 )
 from src.common.logging_utils import get_log_path
+from src.common.mongo import get_motor_client
 
 # Для Windows-консоли с legacy-encoding избегаем падений логгера на unicode-символах
 if hasattr(sys.stdout, "reconfigure"):
@@ -35,9 +35,12 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+_BANNER = "=" * 60
+
 
 async def main():
     """Главная функция для запуска обработки постов."""
+    image_handler = None
     try:
         # Валидация конфигурации
         logger.info("Проверка конфигурации...")
@@ -56,7 +59,11 @@ async def main():
         # Инициализация клиентов
         logger.info("Инициализация клиентов...")
         
-        db_client = AsyncIOMotorClient(EventExtractionConfig.MONGODB_URI)
+        # Клиент общий на процесс: повторные запуски из планировщика не создают новый пул
+        db_client = get_motor_client(
+            EventExtractionConfig.MONGODB_URI,
+            max_pool_size=min(EventExtractionConfig.POST_WORKERS + 2, 10)
+        )
         
         qdrant_client = QdrantClient(
             host=EventExtractionConfig.QDRANT_HOST,
@@ -87,7 +94,14 @@ async def main():
             qdrant_collection=EventExtractionConfig.QDRANT_COLLECTION,
             llm_model=EventExtractionConfig.LLM_MODEL_NAME,
             similarity_threshold_global=EventExtractionConfig.QDRANT_SIMILARITY_THRESHOLD_GLOBAL,
-            similarity_threshold_intra_post=EventExtractionConfig.QDRANT_SIMILARITY_THRESHOLD_INTRA_POST
+            similarity_threshold_intra_post=EventExtractionConfig.QDRANT_SIMILARITY_THRESHOLD_INTRA_POST,
+            min_text_chars=EventExtractionConfig.MIN_POST_TEXT_CHARS,
+            llm_cache_path=EventExtractionConfig.LLM_CACHE_PATH or None,
+            llm_prompt_version=EventExtractionConfig.LLM_PROMPT_VERSION,
+            llm_cache_ttl_hours=EventExtractionConfig.LLM_CACHE_TTL_HOURS,
+            llm_concurrency=EventExtractionConfig.LLM_CONCURRENCY,
+            post_workers=EventExtractionConfig.POST_WORKERS,
+            llm_rpm=EventExtractionConfig.LLM_RPM
         )
         
         # Обработка новых постов
@@ -99,23 +113,23 @@ async def main():
         stats = await processor.process_new_posts_batch(limit=limit)
         
         # Итоговая статистика
-        print("\n" + "=" * 60)
+        print("\n" + _BANNER)
         print("ИТОГОВАЯ СТАТИСТИКА")
-        print("=" * 60)
+        print(_BANNER)
         print(f"Всего постов обработано: {stats['total']}")
         print(f"Успешно: {stats['success']}")
         print(f"Ошибок: {stats['errors']}")
         print(f"Событий извлечено: {stats['events_extracted']}")
-        print("=" * 60)
+        print(_BANNER)
         
         logger.info("✅ Обработка завершена успешно")
     
     except InsufficientQuotaError as e:
         # Критическая ошибка квоты - завершаем с кодом 2
-        logger.critical("=" * 60)
+        logger.critical(_BANNER)
         logger.critical("❌ КРИТИЧЕСКАЯ ОШИБКА: API QUOTA EXCEEDED")
         logger.critical("   Модуль event_extraction завершён")
-        logger.critical("=" * 60)
+        logger.critical(_BANNER)
         sys.exit(2)
     
     except KeyboardInterrupt:
@@ -124,6 +138,10 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Критическая ошибка: {e}", exc_info=True)
         sys.exit(1)
+    
+    finally:
+        if image_handler is not None:
+            await image_handler.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""
+Заполнение нативной даты event_date у событий, сохранённых до её появления.
+
+Дата вычисляется на стороне MongoDB одним update_many с pipeline-обновлением
+по тем же правилам, что и в API (date -> schedule.* -> processed_at -> _id).
+
+Запуск:
+    venv/Scripts/python.exe scripts/backfill_event_dates.py --dry-run
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Добавляем корень проекта в PYTHONPATH для импорта src.*
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.common.event_dates import LEGACY_EVENT_DATE_EXPR
+
+load_dotenv()
+
+# event_date: null тоже считается незаполненным (совпадает с {"event_date": None} в API)
+MISSING_EVENT_DATE_FILTER = {"event_date": None}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Заполнение events.event_date")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Только показать количество документов, без записи в MongoDB",
+    )
+    return parser
+
+
+async def main():
+    args = _build_parser().parse_args()
+    mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+    db_name = os.getenv("MONGODB_DB_NAME", "events_db")
+
+    client = AsyncIOMotorClient(mongodb_uri)
+    db = client[db_name]
+
+    try:
+        missing = await db.events.count_documents(MISSING_EVENT_DATE_FILTER)
+        mode = "DRY-RUN" if args.dry_run else "WRITE"
+        print(f"[events] mode={mode}")
+        print(f"  docs_without_event_date: {missing}")
+        if args.dry_run or not missing:
+            return
+
+        result = await db.events.update_many(
+            MISSING_EVENT_DATE_FILTER,
+            [{"$set": {"event_date": LEGACY_EVENT_DATE_EXPR}}]
+        )
+        print(f"  updated_docs: {result.modified_count}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
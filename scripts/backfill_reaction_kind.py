@@ -0,0 +1,70 @@
+"""
+Пометка like/dislike в user_actions полем kind="reaction".
+
+Уникальный индекс reaction_unique (не больше одной реакции пользователя на
+мероприятие) частичный и охватывает только документы с kind. Реакции,
+сохранённые до его появления, помечаются этим скриптом.
+
+Запуск:
+    venv/Scripts/python.exe scripts/backfill_reaction_kind.py --dry-run
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Добавляем корень проекта в PYTHONPATH для импорта api.*
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from api.interest_service import REACTION_KIND
+
+load_dotenv()
+
+MISSING_KIND_FILTER = {"action": {"$in": ["like", "dislike"]}, "kind": {"$exists": False}}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Заполнение user_actions.kind для реакций")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Только показать количество документов, без записи в MongoDB",
+    )
+    return parser
+
+
+async def main():
+    args = _build_parser().parse_args()
+    mongodb_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+    db_name = os.getenv("MONGODB_DB_NAME", "events_db")
+
+    client = AsyncIOMotorClient(mongodb_uri)
+    db = client[db_name]
+
+    try:
+        missing = await db.user_actions.count_documents(MISSING_KIND_FILTER)
+        mode = "DRY-RUN" if args.dry_run else "WRITE"
+        print(f"[user_actions] mode={mode}")
+        print(f"  reactions_without_kind: {missing}")
+        if args.dry_run or not missing:
+            return
+
+        result = await db.user_actions.update_many(
+            MISSING_KIND_FILTER,
+            {"$set": {"kind": REACTION_KIND}}
+        )
+        print(f"  updated_docs: {result.modified_count}")
+        print("  Перезапустите API, чтобы создать индекс reaction_unique")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -172,6 +172,7 @@ async def main():
         for key, value in stats.items():
             print(f"{key}: {value}")
     finally:
+        await image_handler.close()
         mongo_client.close()
 
 
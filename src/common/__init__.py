@@ -2,6 +2,8 @@
 Общие утилиты проекта.
 """
 
+from .event_dates import EVENT_DATE_EXPR, LEGACY_EVENT_DATE_EXPR
 from .logging_utils import get_log_path
+from .mongo import get_motor_client
 
-__all__ = ["get_log_path"]
+__all__ = ["EVENT_DATE_EXPR", "LEGACY_EVENT_DATE_EXPR", "get_log_path", "get_motor_client"]
@@ -0,0 +1,47 @@
+"""
+Дата события в коллекции events.
+
+Новые события хранят нативную BSON-дату в поле event_date. Для старых
+документов дата вычисляется из строковых полей так же, как раньше делал API.
+"""
+
+from typing import Any, Dict
+
+
+def _to_date(field: str) -> Dict[str, Any]:
+    """Выражение $convert строки/даты в BSON Date без ошибок на мусоре."""
+    return {"$convert": {"input": field, "to": "date", "onError": None, "onNull": None}}
+
+
+# Цепочка источников даты для документов без event_date:
+# date -> schedule.date_start -> schedule.valid_from -> schedule.approximate_start
+# -> processed_at -> время создания _id
+LEGACY_EVENT_DATE_EXPR: Dict[str, Any] = {
+    "$ifNull": [
+        _to_date("$date"),
+        {
+            "$ifNull": [
+                _to_date("$schedule.date_start"),
+                {
+                    "$ifNull": [
+                        _to_date("$schedule.valid_from"),
+                        {
+                            "$ifNull": [
+                                _to_date("$schedule.approximate_start"),
+                                {
+                                    "$ifNull": [
+                                        _to_date("$processed_at"),
+                                        {"$toDate": "$_id"}
+                                    ]
+                                }
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+    ]
+}
+
+# Дата события: сохранённое event_date, а для старых документов — вычисление на лету
+EVENT_DATE_EXPR: Dict[str, Any] = {"$ifNull": ["$event_date", LEGACY_EVENT_DATE_EXPR]}
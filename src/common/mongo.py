@@ -0,0 +1,35 @@
+"""
+Общий клиент MongoDB (Motor) на процесс.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+
+@lru_cache(maxsize=None)
+def get_motor_client(
+    mongodb_uri: str,
+    max_pool_size: int = 10,
+    server_selection_timeout_ms: Optional[int] = None
+) -> AsyncIOMotorClient:
+    """
+    Возвращает единственный AsyncIOMotorClient для набора (uri, размер пула, таймаут).
+
+    Клиент подключается лениво при первой операции и переиспользуется
+    между запусками (например, в планировщике), не открывая новый пул.
+
+    Args:
+        mongodb_uri: URI подключения к MongoDB
+        max_pool_size: Максимальный размер пула соединений
+        server_selection_timeout_ms: Таймаут выбора сервера в мс
+            (None — значение драйвера по умолчанию, 30 с)
+
+    Returns:
+        Клиент MongoDB
+    """
+    options = {"maxPoolSize": max_pool_size}
+    if server_selection_timeout_ms is not None:
+        options["serverSelectionTimeoutMS"] = server_selection_timeout_ms
+    return AsyncIOMotorClient(mongodb_uri, **options)
@@ -40,6 +40,7 @@ from .deduplicator import EventDeduplicator
 from .image_handler import ImageHandler
 from .normalization import TagNormalizer
 from .tag_catalog import TagCatalogService
+from .llm_cache import LLMResponseCache
 
 __all__ = [
     # Модели
@@ -66,6 +67,7 @@ __all__ = [
     "ImageHandler",
     "TagNormalizer",
     "TagCatalogService",
+    "LLMResponseCache",
     
     # Исключения
     "PostProcessingError",
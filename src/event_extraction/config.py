@@ -20,6 +20,10 @@ class EventExtractionConfig:
     LLM_VISION_MODEL: str = os.getenv('LLM_VISION_MODEL', os.getenv('LLM_MODEL_NAME', 'gpt-4o'))
     LLM_TEMPERATURE: float = float(os.getenv('LLM_TEMPERATURE', '0.7'))
     LLM_MAX_TOKENS: int = int(os.getenv('LLM_MAX_TOKENS', '2000'))
+    # Максимум одновременных запросов к LLM
+    LLM_CONCURRENCY: int = int(os.getenv('LLM_CONCURRENCY', '5'))
+    # Лимит запросов к LLM в минуту (0 — без ограничения)
+    LLM_RPM: int = int(os.getenv('LLM_RPM', '0'))
     
     # ===== API ключи LLM =====
     @classmethod
@@ -106,6 +110,18 @@ class EventExtractionConfig:
     # ===== Настройки обработки =====
     MAX_EVENTS_PER_POST: int = int(os.getenv('MAX_EVENTS_PER_POST', '5'))
     BATCH_SIZE: int = int(os.getenv('BATCH_SIZE', '10'))
+    # Посты короче порога без признаков события не отправляются в LLM
+    MIN_POST_TEXT_CHARS: int = int(os.getenv('MIN_POST_TEXT_CHARS', '20'))
+    # Количество постов, обрабатываемых параллельно
+    POST_WORKERS: int = int(os.getenv('POST_WORKERS', '3'))
+    
+    # ===== Кэш ответов LLM =====
+    # Путь к SQLite файлу кэша; пустое значение отключает кэш
+    LLM_CACHE_PATH: str = os.getenv('LLM_CACHE_PATH', '')
+    # Версия промптов; при изменении промптов увеличить, чтобы сбросить кэш
+    LLM_PROMPT_VERSION: str = os.getenv('LLM_PROMPT_VERSION', '1')
+    # Время жизни записей кэша в часах (0 — без ограничения)
+    LLM_CACHE_TTL_HOURS: float = float(os.getenv('LLM_CACHE_TTL_HOURS', '720'))
     
     @classmethod
     def validate(cls) -> Tuple[bool, str]:
@@ -171,6 +187,8 @@ class EventExtractionConfig:
         print(f"  Vision Model: {cls.LLM_VISION_MODEL}")
         print(f"  Temperature: {cls.LLM_TEMPERATURE}")
         print(f"  Max Tokens: {cls.LLM_MAX_TOKENS}")
+        print(f"  Concurrency: {cls.LLM_CONCURRENCY}")
+        print(f"  RPM Limit: {cls.LLM_RPM or 'unlimited'}")
         print(f"  API Keys: {len(api_keys)} ключ(ей) настроено")
         print()
         print("  === Генерация изображений ===")
@@ -192,4 +210,7 @@ class EventExtractionConfig:
         print(f"  Images Dir: {cls.IMAGES_DIR}")
         print(f"  Max Events Per Post: {cls.MAX_EVENTS_PER_POST}")
         print(f"  Batch Size: {cls.BATCH_SIZE}")
+        print(f"  Min Post Text Chars: {cls.MIN_POST_TEXT_CHARS}")
+        print(f"  Post Workers: {cls.POST_WORKERS}")
+        print(f"  LLM Cache: {cls.LLM_CACHE_PATH or 'disabled'} (prompt v{cls.LLM_PROMPT_VERSION}, TTL {cls.LLM_CACHE_TTL_HOURS}h)")
         print("=" * 60)
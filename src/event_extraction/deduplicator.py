@@ -2,6 +2,7 @@
 Модуль семантической дедупликации событий через Qdrant.
 """
 
+import asyncio
 import hashlib
 import logging
 import re
@@ -182,7 +183,8 @@ class EventDeduplicator:
                 ]
             )
             
-            hash_results = self.client.scroll(
+            hash_results = await asyncio.to_thread(
+                self.client.scroll,
                 collection_name=self.collection_name,
                 scroll_filter=hash_filter,
                 limit=1,
@@ -199,14 +201,15 @@ class EventDeduplicator:
                         "Найден дубликат по хэшу без event_id в payload, пропускаем дедупликацию"
                     )
                     return False, None
-                logger.info(
-                    f"Найден дубликат по хэшу: {event.title[:50]} "
-                    f"(hash={effective_canonical_hash[:8]}...)"
+                logger.debug(
+                    "Найден дубликат по хэшу: %s (hash=%s...)",
+                    event.title[:50], effective_canonical_hash[:8]
                 )
                 return True, str(original_event_id)
             
             # Шаг 2: Семантический поиск
-            search_results = self.client.search(
+            search_results = await asyncio.to_thread(
+                self.client.search,
                 collection_name=self.collection_name,
                 query_vector=embedding,
                 limit=5,  # Ищем топ-5 похожих
@@ -224,12 +227,10 @@ class EventDeduplicator:
                         "Найден семантический дубликат без event_id в payload, пропускаем дедупликацию"
                     )
                     return False, None
-                logger.info(
-                    f"Найден семантический дубликат: {event.title[:50]} "
-                    f"(score={best_match.score:.3f}, threshold={self.similarity_threshold})"
-                )
                 logger.debug(
-                    f"Оригинал: {best_match.payload.get('title', 'N/A')[:50]}"
+                    "Найден семантический дубликат: %s (score=%.3f, threshold=%s, оригинал: %s)",
+                    event.title[:50], best_match.score, self.similarity_threshold,
+                    payload.get('title', 'N/A')[:50]
                 )
                 return True, str(original_event_id)
             
@@ -316,14 +317,15 @@ class EventDeduplicator:
                 payload=payload
             )
             
-            self.client.upsert(
+            await asyncio.to_thread(
+                self.client.upsert,
                 collection_name=self.collection_name,
                 points=[point]
             )
             
-            logger.info(
-                f"✅ Событие добавлено в Qdrant: {event.title[:50]} "
-                f"(event_id={event_id}, point_id={qdrant_point_id})"
+            logger.debug(
+                "✅ Событие добавлено в Qdrant: %s (event_id=%s, point_id=%s)",
+                event.title[:50], event_id, qdrant_point_id
             )
             return True
         
@@ -357,7 +359,8 @@ class EventDeduplicator:
                 ]
             )
 
-            scroll_result = self.client.scroll(
+            scroll_result = await asyncio.to_thread(
+                self.client.scroll,
                 collection_name=self.collection_name,
                 scroll_filter=event_filter,
                 limit=1,
@@ -388,18 +391,19 @@ class EventDeduplicator:
                 sources.append(new_source_dict)
                 
                 # Обновление payload
-                self.client.set_payload(
+                await asyncio.to_thread(
+                    self.client.set_payload,
                     collection_name=self.collection_name,
                     payload={"sources": sources},
                     points=[point.id]
                 )
                 
-                logger.info(
-                    f"✅ Источник добавлен к событию {original_event_id}: "
-                    f"{new_source.channel}/{new_source.post_id}"
+                logger.debug(
+                    "✅ Источник добавлен к событию %s: %s/%s",
+                    original_event_id, new_source.channel, new_source.post_id
                 )
             else:
-                logger.debug(f"Источник уже существует, пропускаем")
+                logger.debug("Источник уже существует, пропускаем")
             
             return True
         
@@ -8,6 +8,7 @@ import asyncio
 import logging
 import base64
 import html
+import uuid
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
@@ -38,6 +39,8 @@ class ImageHandler:
         """
         self.images_dir = Path(images_dir)
         self.images_dir.mkdir(exist_ok=True)
+        # Общая HTTP-сессия (keep-alive между запросами), создаётся лениво
+        self._session: Optional[aiohttp.ClientSession] = None
         
         # LLM Image Generation настройки
         self.image_llm_base_url = image_llm_base_url
@@ -49,6 +52,34 @@ class ImageHandler:
         else:
             logger.warning("ImageHandler: генерация изображений не настроена")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Общая aiohttp-сессия с пулом соединений.
+        
+        Создаётся при первом запросе внутри работающего event loop,
+        чтобы TCP/TLS соединения переиспользовались между скачиваниями
+        и запросами генерации.
+        
+        Returns:
+            Открытая ClientSession
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                ),
+                timeout=aiohttp.ClientTimeout(total=60, sock_connect=10)
+            )
+        return self._session
+    
+    async def close(self):
+        """Закрытие HTTP-сессии."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     async def download_image_from_url(self, url: str) -> Optional[str]:
         """
         Скачивание изображения по URL.
@@ -60,39 +91,36 @@ class ImageHandler:
             Относительный путь к сохранённому файлу или None при ошибке
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status != 200:
-                        logger.error(f"Ошибка скачивания изображения: HTTP {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200:
+                    logger.error(f"Ошибка скачивания изображения: HTTP {response.status}")
+                    return None
                     
-                    # Генерация имени файла
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    extension = url.split('.')[-1].split('?')[0] or 'jpg'
-                    if extension not in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                        extension = 'jpg'
-                    filename = f"downloaded_{timestamp}.{extension}"
-                    filepath = (self.images_dir / filename).resolve()
+                # Генерация имени файла: афиши скачиваются параллельно,
+                # поэтому к времени добавляется случайный суффикс
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                extension = url.split('.')[-1].split('?')[0] or 'jpg'
+                if extension not in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
+                    extension = 'jpg'
+                filename = f"downloaded_{timestamp}_{uuid.uuid4().hex[:12]}.{extension}"
+                filepath = (self.images_dir / filename).resolve()
                     
-                    # Сохранение файла
-                    content = await response.read()
-                    with open(filepath, 'wb') as f:
-                        f.write(content)
+                # Сохранение файла (блокирующий I/O — в пуле потоков)
+                content = await response.read()
+                if not await asyncio.to_thread(self._write_bytes, filepath, content):
+                    logger.error(f"Файл не найден после скачивания: {filepath}")
+                    return None
                     
-                    # Проверка существования
-                    if not filepath.exists():
-                        logger.error(f"Файл не найден после скачивания: {filepath}")
-                        return None
-                    
-                    # Возвращаем путь относительно images_dir (совместимо с telegram_parser)
-                    images_root = self.images_dir.resolve()
-                    try:
-                        relative_path = str(filepath.relative_to(images_root))
-                    except ValueError:
-                        # Fallback на имя файла, если путь не удалось привести к images_dir
-                        relative_path = filepath.name
-                    logger.info(f"Изображение скачано: {relative_path}")
-                    return relative_path
+                # Возвращаем путь относительно images_dir (совместимо с telegram_parser)
+                images_root = self.images_dir.resolve()
+                try:
+                    relative_path = str(filepath.relative_to(images_root))
+                except ValueError:
+                    # Fallback на имя файла, если путь не удалось привести к images_dir
+                    relative_path = filepath.name
+                logger.info(f"Изображение скачано: {relative_path}")
+                return relative_path
                     
         except asyncio.TimeoutError:
             logger.error(f"Таймаут при скачивании изображения: {url}")
@@ -101,6 +129,22 @@ class ImageHandler:
             logger.error(f"Ошибка скачивания изображения: {e}", exc_info=True)
             return None
     
+    @staticmethod
+    def _write_bytes(filepath: Path, content: bytes) -> bool:
+        """
+        Запись файла и проверка, что он появился на диске.
+        
+        Args:
+            filepath: Путь к файлу
+            content: Содержимое
+            
+        Returns:
+            True если файл существует после записи
+        """
+        with open(filepath, 'wb') as f:
+            f.write(content)
+        return filepath.exists()
+    
     def image_to_base64(self, image_path: str) -> Optional[str]:
         """
         Конвертация изображения в base64.
@@ -117,22 +161,20 @@ class ImageHandler:
             if not filepath.is_absolute():
                 # Если путь относительный, ищем относительно images_dir
                 filepath = self.images_dir / filepath
-            filepath = filepath.resolve()
             
-            # Проверка существования
-            if not filepath.exists():
+            # Читаем файл сразу: отсутствие файла и каталог вместо файла
+            # обрабатываются исключениями open без отдельных stat-вызовов
+            try:
+                with open(filepath, 'rb') as f:
+                    image_data = f.read()
+            except FileNotFoundError:
                 logger.error(f"Файл изображения не найден: {filepath}")
                 return None
-            
-            # Проверка, что это файл
-            if not filepath.is_file():
+            except IsADirectoryError:
                 logger.error(f"Указанный путь не является файлом: {filepath}")
                 return None
             
-            # Читаем файл
-            with open(filepath, 'rb') as f:
-                image_data = f.read()
-                return base64.b64encode(image_data).decode('utf-8')
+            return base64.b64encode(image_data).decode('utf-8')
                 
         except Exception as e:
             logger.error(f"Ошибка конвертации изображения в base64: {e}", exc_info=True)
@@ -180,50 +222,50 @@ class ImageHandler:
         
         try:
             logger.info("Запрос генерации изображения")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url,
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
+            session = self._get_session()
+            async with session.post(
+                url,
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
                     
-                    if response.status == 401:
-                        logger.error("Неверный API ключ для генерации изображений (401)")
-                        return None
+                if response.status == 401:
+                    logger.error("Неверный API ключ для генерации изображений (401)")
+                    return None
                     
-                    if response.status == 429:
-                        logger.error("Rate limit (429) при генерации изображения")
-                        return None
+                if response.status == 429:
+                    logger.error("Rate limit (429) при генерации изображения")
+                    return None
                     
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Ошибка генерации изображения: {response.status} - {error_text}")
-                        return None
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Ошибка генерации изображения: {response.status} - {error_text}")
+                    return None
                     
-                    # Обработка ответа
-                    data = await response.json()
+                # Обработка ответа
+                data = await response.json()
                     
-                    # Проверка формата ответа (OpenAI-совместимый)
-                    if "data" not in data or not data["data"]:
-                        logger.error("Некорректный ответ API: отсутствует data")
-                        return None
+                # Проверка формата ответа (OpenAI-совместимый)
+                if "data" not in data or not data["data"]:
+                    logger.error("Некорректный ответ API: отсутствует data")
+                    return None
                     
-                    image_url = data["data"][0].get("url")
-                    if not image_url:
-                        logger.error("В ответе отсутствует URL изображения")
-                        return None
+                image_url = data["data"][0].get("url")
+                if not image_url:
+                    logger.error("В ответе отсутствует URL изображения")
+                    return None
                     
-                    # Скачиваем изображение
-                    logger.info(f"Скачивание сгенерированного изображения: {image_url[:50]}...")
-                    local_path = await self.download_image_from_url(image_url)
+                # Скачиваем изображение
+                logger.info(f"Скачивание сгенерированного изображения: {image_url[:50]}...")
+                local_path = await self.download_image_from_url(image_url)
                     
-                    if local_path:
-                        logger.info(f"✅ Изображение сгенерировано и сохранено: {local_path}")
-                        return local_path
-                    else:
-                        logger.error("Не удалось скачать сгенерированное изображение")
-                        return None
+                if local_path:
+                    logger.info(f"✅ Изображение сгенерировано и сохранено: {local_path}")
+                    return local_path
+                else:
+                    logger.error("Не удалось скачать сгенерированное изображение")
+                    return None
                         
         except asyncio.TimeoutError:
             logger.error("Таймаут при генерации изображения")
@@ -251,7 +293,7 @@ class ImageHandler:
         description = (event_description or "").strip()
         safe_description = description[:240]
 
-        logger.info(f"Генерация афиши для события: {title[:50]}...")
+        logger.debug("Генерация афиши для события: %s...", title[:50])
 
         # 1) Основной промпт
         primary_prompt = (
@@ -273,7 +315,9 @@ class ImageHandler:
             return poster_path
 
         # 3) Локальный fallback: SVG-постер, чтобы путь всегда был в events.images
-        return self._create_local_fallback_poster(title=title, description=safe_description)
+        return await asyncio.to_thread(
+            self._create_local_fallback_poster, title=title, description=safe_description
+        )
 
     def _create_local_fallback_poster(self, title: str, description: str) -> Optional[str]:
         """
@@ -2,13 +2,21 @@
 LangGraph агент для многошагового извлечения событий из постов.
 """
 
+import asyncio
 import logging
 import json
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from langgraph.graph import StateGraph, END
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, RateLimitError
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 from qdrant_client import QdrantClient
 
 from .models import (
@@ -23,13 +31,52 @@ from .models import (
 )
 from .image_handler import ImageHandler
 from .normalization import TagNormalizer
+from .llm_cache import LLMResponseCache
+from .rate_limiter import AsyncRateLimiter
 
 logger = logging.getLogger(__name__)
 
 
+def _is_retryable_rate_limit(error: BaseException) -> bool:
+    """429 от API, кроме исчерпанной квоты (повтор не поможет)."""
+    return isinstance(error, RateLimitError) and getattr(error, "code", None) != "insufficient_quota"
+
+
+def _retry_after_seconds(error: Optional[BaseException]) -> Optional[float]:
+    """Значение заголовка Retry-After (в секундах) из ответа API, если есть."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class _WaitRetryAfter:
+    """Ожидание по Retry-After провайдера, иначе экспоненциальный backoff с jitter."""
+    
+    def __init__(self, max_wait: float):
+        self.max_wait = max_wait
+        self._fallback = wait_exponential_jitter(initial=1, max=max_wait)
+    
+    def __call__(self, retry_state: RetryCallState) -> float:
+        outcome = retry_state.outcome
+        retry_after = _retry_after_seconds(outcome.exception() if outcome else None)
+        if retry_after is not None:
+            return min(retry_after, self.max_wait)
+        return self._fallback(retry_state)
+
+
 class EventExtractionGraph:
     """LangGraph агент для извлечения событий."""
     
+    # Экспоненциальный backoff на 429
+    _RATE_LIMIT_MAX_ATTEMPTS = 5
+    _RATE_LIMIT_MAX_WAIT = 60.0
+    
     def __init__(
         self,
         llm_client: AsyncOpenAI,
@@ -37,7 +84,10 @@ class EventExtractionGraph:
         qdrant_client: Optional[QdrantClient] = None,
         model_name: str = "gpt-4o",
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        response_cache: Optional[LLMResponseCache] = None,
+        llm_concurrency: int = 5,
+        rate_limiter: Optional[AsyncRateLimiter] = None
     ):
         """
         Инициализация агента.
@@ -48,12 +98,18 @@ class EventExtractionGraph:
             model_name: Название модели LLM
             temperature: Температура генерации
             max_tokens: Максимум токенов
+            response_cache: Персистентный кэш ответов LLM (опционально)
+            llm_concurrency: Максимум одновременных запросов к LLM
+            rate_limiter: Лимитер запросов в минуту (опционально)
         """
         self.llm_client = llm_client
         self.image_handler = image_handler
         self.model_name = model_name
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.response_cache = response_cache
+        self._llm_semaphore = asyncio.Semaphore(max(1, llm_concurrency))
+        self.rate_limiter = rate_limiter
         self.normalizer = TagNormalizer(
             llm_client=llm_client,
             model_name=model_name,
@@ -80,6 +136,45 @@ class EventExtractionGraph:
         
         return workflow.compile()
     
+    async def _create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> Any:
+        """
+        Запрос к chat completions с лимитами и повтором при 429.
+        
+        Args:
+            messages: Список сообщений
+            temperature: Температура генерации
+            max_tokens: Максимум токенов
+            
+        Returns:
+            Ответ API
+        """
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(_is_retryable_rate_limit),
+            wait=_WaitRetryAfter(self._RATE_LIMIT_MAX_WAIT),
+            stop=stop_after_attempt(self._RATE_LIMIT_MAX_ATTEMPTS),
+            reraise=True,
+        ):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    logger.warning(
+                        f"Rate limit (429), повтор запроса к LLM "
+                        f"(попытка {attempt.retry_state.attempt_number})"
+                    )
+                async with self._llm_semaphore:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire()
+                    return await self.llm_client.chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+    
     async def _call_llm(
         self,
         messages: List[Dict[str, str]],
@@ -97,14 +192,27 @@ class EventExtractionGraph:
         Returns:
             Ответ LLM или None при ошибке
         """
-        try:
-            completion = await self.llm_client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=temperature or self.temperature,
-                max_tokens=max_tokens or self.max_tokens
+        temperature = temperature or self.temperature
+        max_tokens = max_tokens or self.max_tokens
+        
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(
+                self.model_name, messages, temperature, max_tokens
             )
-            return completion.choices[0].message.content or ""
+            # SQLite читается/пишется в пуле потоков, чтобы не блокировать
+            # другие одновременные вызовы LLM (кэш защищён своим threading.Lock)
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None:
+                logger.debug("Ответ LLM взят из кэша")
+                return cached
+        
+        try:
+            completion = await self._create_completion(messages, temperature, max_tokens)
+            content = completion.choices[0].message.content or ""
+            if cache_key is not None and content:
+                await asyncio.to_thread(self.response_cache.set, cache_key, content)
+            return content
         
         except Exception as e:
             logger.error(f"Ошибка вызова LLM: {e}", exc_info=True)
@@ -120,7 +228,7 @@ class EventExtractionGraph:
         Returns:
             Обновлённое состояние
         """
-        logger.info("Шаг 1: Разделение поста на события")
+        logger.debug("Шаг 1: Разделение поста на события")
         state.current_step = "split_into_events"
         
         system_prompt = """Ты — ассистент, разделяющий посты на отдельные события.
@@ -172,7 +280,7 @@ class EventExtractionGraph:
                 raise ValueError("Ответ не является массивом")
             
             state.raw_events = [str(event) for event in raw_events if event]
-            logger.info(f"✅ Найдено событий: {len(state.raw_events)}")
+            logger.debug("✅ Найдено событий: %d", len(state.raw_events))
         
         except Exception as e:
             logger.error(f"Ошибка парсинга разделённых событий: {e}")
@@ -191,7 +299,7 @@ class EventExtractionGraph:
         Returns:
             Обновлённое состояние
         """
-        logger.info("Шаг 2: Извлечение структурированных данных")
+        logger.debug("Шаг 2: Извлечение структурированных данных")
         state.current_step = "extract_event_data"
         
         current_year = datetime.now().year
@@ -236,16 +344,24 @@ class EventExtractionGraph:
 
 Ответь ТОЛЬКО валидным JSON, без дополнительного текста."""
         
-        for event_text in state.raw_events:
-            user_prompt = f"Текст события:\n{event_text}"
-            
-            messages = [
+        event_texts = [
+            event_text for event_text in state.raw_events
+            if event_text and event_text.strip()
+        ]
+        if len(event_texts) < len(state.raw_events):
+            logger.debug("Пропущено пустых текстов событий: %d", len(state.raw_events) - len(event_texts))
+        
+        # Запросы по событиям поста идут параллельно (в пределах llm_concurrency),
+        # разбор ответов — в исходном порядке
+        responses = await asyncio.gather(*(
+            self._call_llm([
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-            
-            response = await self._call_llm(messages)
-            
+                {"role": "user", "content": f"Текст события:\n{event_text}"}
+            ])
+            for event_text in event_texts
+        ))
+        
+        for response in responses:
             if not response:
                 logger.error("Не получен ответ от LLM на этапе извлечения")
                 state.errors.append("Ошибка извлечения данных события")
@@ -365,13 +481,13 @@ class EventExtractionGraph:
                 )
                 
                 state.events.append(event)
-                logger.info(f"✅ Извлечено событие: {event.title[:50]}")
+                logger.debug("✅ Извлечено событие: %s", event.title[:50])
             
             except Exception as e:
                 logger.error(f"Ошибка парсинга данных события: {e}", exc_info=True)
                 state.errors.append(f"Ошибка парсинга: {e}")
         
-        logger.info(f"Всего извлечено событий: {len(state.events)}")
+        logger.debug("Всего извлечено событий: %d", len(state.events))
         return state
 
     @staticmethod
@@ -435,7 +551,7 @@ class EventExtractionGraph:
         Returns:
             Обновлённое состояние
         """
-        logger.info("Шаг 3: Обработка изображений")
+        logger.debug("Шаг 3: Обработка изображений")
         state.current_step = "process_images"
         
         normalized_state_images = [
@@ -446,40 +562,52 @@ class EventExtractionGraph:
 
         # Если есть изображения в посте, используем их для всех событий
         if normalized_state_images:
-            logger.info(f"Используем изображения из поста: {len(normalized_state_images)} шт.")
+            logger.debug("Используем изображения из поста: %d шт.", len(normalized_state_images))
             for event in state.events:
                 event.images = normalized_state_images.copy()
                 event.poster_generated = False
         
         else:
-            # Генерация афиш для событий без изображений
-            logger.info("Изображения отсутствуют, генерируем афиши")
+            # Генерация афиш для событий без изображений (параллельно)
+            logger.debug("Изображения отсутствуют, генерируем афиши")
             
             for event in state.events:
-                try:
-                    event.images = [
-                        str(path).strip()
-                        for path in (event.images or [])
-                        if path and str(path).strip()
-                    ]
-                    logger.info(f"Генерация афиши для: {event.title[:50]}")
-                    poster_path = await self.image_handler.generate_event_poster(
+                event.images = [
+                    str(path).strip()
+                    for path in (event.images or [])
+                    if path and str(path).strip()
+                ]
+                logger.debug("Генерация афиши для: %s", event.title[:50])
+            
+            results = await asyncio.gather(
+                *(
+                    self.image_handler.generate_event_poster(
                         event_title=event.title,
                         event_description=event.description
                     )
-                    
-                    if poster_path:
-                        event.images = [str(poster_path).strip()]
-                        event.poster_generated = True
-                        logger.info(f"✅ Афиша сгенерирована: {poster_path}")
-                    else:
-                        event.poster_generated = False
-                        logger.warning(f"⚠️  Не удалось сгенерировать афишу")
-                
-                except Exception as e:
+                    for event in state.events
+                ),
+                return_exceptions=True
+            )
+            
+            for event, poster_path in zip(state.events, results):
+                if isinstance(poster_path, BaseException):
+                    # Отмена (CancelledError) — не ошибка генерации: пробрасываем дальше
+                    if not isinstance(poster_path, Exception):
+                        raise poster_path
+                    event.poster_generated = False
+                    logger.error(
+                        f"Ошибка генерации афиши: {poster_path}",
+                        exc_info=poster_path
+                    )
+                    state.errors.append(f"Ошибка генерации афиши: {poster_path}")
+                elif poster_path:
+                    event.images = [str(poster_path).strip()]
+                    event.poster_generated = True
+                    logger.debug("✅ Афиша сгенерирована: %s", poster_path)
+                else:
                     event.poster_generated = False
-                    logger.error(f"Ошибка генерации афиши: {e}", exc_info=True)
-                    state.errors.append(f"Ошибка генерации афиши: {e}")
+                    logger.warning(f"⚠️  Не удалось сгенерировать афишу")
         
         return state
     
@@ -506,9 +634,12 @@ class EventExtractionGraph:
         Returns:
             Список извлечённых событий
         """
-        logger.info("=" * 60)
-        logger.info("ЗАПУСК LANGGRAPH АГЕНТА")
-        logger.info("=" * 60)
+        logger.debug("Запуск LangGraph агента")
+        
+        # Извлечение идёт только по тексту: пустой пост — гарантированно пустой ответ LLM
+        if not text or not text.strip():
+            logger.info("Пустой текст поста, извлечение пропущено")
+            return []
         
         # Инициализация состояния
         initial_state = ExtractionState(
@@ -537,14 +668,12 @@ class EventExtractionGraph:
                 logger.error(f"Неожиданный тип результата графа: {type(raw_result).__name__}")
                 return []
             
-            logger.info("=" * 60)
-            logger.info("РЕЗУЛЬТАТ ИЗВЛЕЧЕНИЯ:")
-            logger.info(f"  Событий извлечено: {len(result_state.events)}")
-            logger.info(f"  Ошибок: {len(result_state.errors)}")
-            if result_state.errors:
-                for error in result_state.errors:
-                    logger.warning(f"    - {error}")
-            logger.info("=" * 60)
+            logger.debug(
+                "Результат извлечения: событий=%d, ошибок=%d",
+                len(result_state.events), len(result_state.errors)
+            )
+            for error in result_state.errors:
+                logger.warning("Ошибка извлечения: %s", error)
             
             return result_state.events
         
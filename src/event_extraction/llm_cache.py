@@ -0,0 +1,128 @@
+"""
+Персистентный кэш ответов LLM на SQLite.
+
+Ключ — хэш от модели, версии промптов и сообщений, поэтому повторный
+прогон обработки по уже виденным постам не вызывает LLM заново.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Кэш ответов LLM в SQLite (hash TEXT PRIMARY KEY, response TEXT, created_at REAL)."""
+
+    def __init__(self, path: str, prompt_version: str = "1", ttl_seconds: float = 0):
+        """
+        Инициализация кэша.
+
+        Args:
+            path: Путь к файлу базы SQLite
+            prompt_version: Версия промптов; смена версии инвалидирует кэш
+            ttl_seconds: Время жизни записи в секундах (0 — без ограничения)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "hash TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL DEFAULT 0)"
+        )
+        # Базы, созданные до появления TTL, получают колонку created_at
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(llm_responses)")}
+        if "created_at" not in columns:
+            self._conn.execute(
+                "ALTER TABLE llm_responses ADD COLUMN created_at REAL NOT NULL DEFAULT 0"
+            )
+        if self.ttl_seconds > 0:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        self._conn.commit()
+        logger.info(
+            f"LLM кэш открыт: {self.path} (prompt_version={prompt_version}, "
+            f"ttl={self.ttl_seconds or 'none'})"
+        )
+
+    def make_key(
+        self,
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """
+        Построение ключа кэша.
+
+        Args:
+            model_name: Название модели
+            messages: Сообщения запроса
+            temperature: Температура генерации
+            max_tokens: Максимум токенов
+
+        Returns:
+            Hex-дайджест blake2b
+        """
+        payload = json.dumps(
+            [model_name, self.prompt_version, temperature, max_tokens, messages],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Получение ответа из кэша.
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            Сохранённый ответ или None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE hash = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        response, created_at = row
+        if self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds:
+            return None
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Сохранение ответа в кэш.
+
+        Args:
+            key: Ключ кэша
+            response: Ответ LLM
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (hash, response, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Закрытие соединения с базой."""
+        with self._lock:
+            self._conn.close()
@@ -167,10 +167,14 @@ class RawPost(BaseModel):
     channel: str = Field(..., description="Название канала")
     message_date: Optional[datetime] = Field(None, description="Дата публикации поста в Telegram")
     post_url: Optional[str] = Field(None, description="Ссылка на пост")
+    photo_url: Optional[str] = Field(None, description="Legacy-поле: путь к одной картинке")
     
     class Config:
         """Конфигурация Pydantic модели."""
         populate_by_name = True
+        # Пост только читается при обработке; лишние поля документа Mongo (_id и т.п.) игнорируются
+        frozen = True
+        extra = "ignore"
 
 
 class ExtractionState(BaseModel):
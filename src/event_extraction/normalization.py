@@ -2,6 +2,7 @@
 Канонизация интересов и категорий через taxonomy + ограниченный LLM fallback.
 """
 
+import asyncio
 import json
 import logging
 from pathlib import Path
@@ -65,6 +66,9 @@ class TagNormalizer:
         for canonical in self.canonical_terms:
             self.aliases.setdefault(canonical, canonical)
 
+        # Список допустимых canonical для LLM fallback не меняется после загрузки taxonomy.
+        self._allowed_canonicals_prompt = ", ".join(sorted(self.canonical_terms))
+
     @staticmethod
     def _load_taxonomy(path: Path) -> Dict[str, object]:
         if not path.exists():
@@ -135,7 +139,8 @@ class TagNormalizer:
                     if kind == "category"
                     else self.interest_similarity_threshold
                 )
-                canonical, slug = self.tag_catalog.resolve_with_embedding(
+                canonical, slug = await asyncio.to_thread(
+                    self.tag_catalog.resolve_with_embedding,
                     kind=kind,
                     raw_tag=normalized,
                     embedding=embedding,
@@ -143,7 +148,11 @@ class TagNormalizer:
                     similarity_threshold=similarity_threshold,
                 )
             else:
-                existing_slug = self.tag_catalog.get_slug_by_canonical(kind=kind, canonical_name=canonical)
+                existing_slug = await asyncio.to_thread(
+                    self.tag_catalog.get_slug_by_canonical,
+                    kind=kind,
+                    canonical_name=canonical,
+                )
                 if existing_slug:
                     slug = existing_slug
 
@@ -311,7 +320,6 @@ class TagNormalizer:
         """
         Fallback-канонизация через LLM, но только в пределах canonical_terms.
         """
-        canonical_sorted = sorted(self.canonical_terms)
         system_prompt = (
             "Ты нормализуешь теги для афиши событий. "
             "Выбери один наиболее близкий canonical ТОЛЬКО из переданного списка. "
@@ -320,7 +328,7 @@ class TagNormalizer:
         )
         user_prompt = (
             f"tag: {tag}\n"
-            f"allowed_canonicals: {', '.join(canonical_sorted)}"
+            f"allowed_canonicals: {self._allowed_canonicals_prompt}"
         )
         messages = [
             {"role": "system", "content": system_prompt},
@@ -2,13 +2,17 @@
 Оркестратор обработки постов с проверкой дублей и извлечением событий.
 """
 
+import asyncio
 import logging
 import re
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from qdrant_client import QdrantClient
 from openai import AsyncOpenAI
 
@@ -16,10 +20,15 @@ from .models import RawPost, StructuredEvent, WeightedInterest
 from .langgraph_agent import EventExtractionGraph
 from .deduplicator import EventDeduplicator
 from .image_handler import ImageHandler
+from .llm_cache import LLMResponseCache
+from .rate_limiter import AsyncRateLimiter
 from .exceptions import PostProcessingError, EventDeduplicationError, InsufficientQuotaError
 
 logger = logging.getLogger(__name__)
 
+# Разделитель для логов пакетной обработки
+_BANNER = "=" * 60
+
 # Импорт метрик (ленивая инициализация)
 try:
     from src.monitoring import get_event_metrics
@@ -28,10 +37,27 @@ except ImportError:
     METRICS_AVAILABLE = False
     logger.warning("Модуль мониторинга недоступен, метрики отключены")
 
+# Признаки события в тексте: дата, время, цена, билеты/вход, дни недели
+_EVENT_HINT_PATTERN = re.compile(
+    r"\d{1,2}[./]\d{1,2}"
+    r"|\d{1,2}:\d{2}"
+    r"|\d{1,2}\s+(?:январ|феврал|март|апрел|ма[яй]|июн|июл|август|сентябр|октябр|ноябр|декабр)"
+    r"|руб|₽|билет|вход|регистрац"
+    r"|понедельник|вторник|сред[уа]|четверг|пятниц|суббот|воскресен|сегодня|завтра",
+    re.IGNORECASE
+)
+
 
 class PostProcessor:
     """Процессор для обработки постов с дедупликацией и извлечением событий."""
     
+    # Сколько постов заранее читается из MongoDB в очередь обработки
+    _PREFETCH_QUEUE_SIZE = 2
+    # Размер порции документов, запрашиваемой у MongoDB курсором raw_posts
+    _CURSOR_BATCH_SIZE = 50
+    # Сколько отметок processed_posts копится перед одной bulk_write в пакетном режиме
+    _PROCESSED_MARKS_FLUSH_SIZE = 20
+    
     def __init__(
         self,
         db_client: AsyncIOMotorClient,
@@ -42,7 +68,14 @@ class PostProcessor:
         qdrant_collection: str = "events",
         llm_model: str = "gpt-4o",
         similarity_threshold_global: float = 0.92,
-        similarity_threshold_intra_post: float = 0.86
+        similarity_threshold_intra_post: float = 0.86,
+        min_text_chars: int = 20,
+        llm_cache_path: Optional[str] = None,
+        llm_prompt_version: str = "1",
+        llm_cache_ttl_hours: float = 0,
+        llm_concurrency: int = 5,
+        post_workers: int = 3,
+        llm_rpm: int = 0
     ):
         """
         Инициализация процессора.
@@ -57,18 +90,43 @@ class PostProcessor:
             llm_model: Название LLM модели
             similarity_threshold_global: Порог сходства для межпостовой дедупликации
             similarity_threshold_intra_post: Порог merge для событий внутри одного поста
+            min_text_chars: Минимальная длина текста поста для вызова LLM
+            llm_cache_path: Путь к SQLite кэшу ответов LLM (None — кэш выключен)
+            llm_prompt_version: Версия промптов для ключа кэша
+            llm_cache_ttl_hours: Время жизни записей кэша LLM в часах (0 — без ограничения)
+            llm_concurrency: Максимум одновременных запросов к LLM
+            post_workers: Количество постов, обрабатываемых параллельно
+            llm_rpm: Лимит запросов к LLM в минуту (0 — без ограничения)
         """
         self.db = db_client[db_name]
         self.db_name = db_name
         self.llm_client = llm_client
         self.similarity_threshold_intra_post = similarity_threshold_intra_post
+        self.min_text_chars = min_text_chars
+        self.post_workers = max(1, post_workers)
+        self._dedup_lock = asyncio.Lock()
+        # Буфер отметок processed_posts (None — пишем сразу, вне пакетной обработки)
+        self._processed_marks_buffer: Optional[List[UpdateOne]] = None
+        self._indexes_ready = False
         
         # Инициализация компонентов
+        self.rate_limiter = AsyncRateLimiter(llm_rpm, 60.0) if llm_rpm > 0 else None
+        response_cache = (
+            LLMResponseCache(
+                llm_cache_path,
+                prompt_version=llm_prompt_version,
+                ttl_seconds=llm_cache_ttl_hours * 3600
+            )
+            if llm_cache_path else None
+        )
         self.extraction_agent = EventExtractionGraph(
             llm_client=llm_client,
             image_handler=image_handler,
             qdrant_client=qdrant_client,
-            model_name=llm_model
+            model_name=llm_model,
+            response_cache=response_cache,
+            llm_concurrency=llm_concurrency,
+            rate_limiter=self.rate_limiter
         )
         
         self.deduplicator = EventDeduplicator(
@@ -82,6 +140,23 @@ class PostProcessor:
             f"collections=raw_posts/events/processed_posts)"
         )
     
+    async def ensure_indexes(self):
+        """
+        Создание индексов, на которые опирается выборка необработанных постов.
+        
+        processed_posts(post_id, channel) обслуживает $lookup и отметки
+        обработки, raw_posts(message_date) — сортировку backlog'а.
+        Ошибка создания индексов не останавливает обработку.
+        """
+        if self._indexes_ready:
+            return
+        try:
+            await self.db.processed_posts.create_index([("post_id", 1), ("channel", 1)])
+            await self.db.raw_posts.create_index([("message_date", -1)])
+            self._indexes_ready = True
+        except Exception as e:
+            logger.warning(f"Не удалось создать индексы MongoDB: {e}")
+    
     async def _is_post_processed(self, post_id: int, channel: str) -> bool:
         """
         Проверка, был ли пост уже обработан.
@@ -115,22 +190,41 @@ class PostProcessor:
             channel: Название канала
             event_ids: Список ID извлечённых событий
         """
+        query = {"post_id": post_id, "channel": channel}
+        update = {
+            "$set": {
+                "processed_at": datetime.utcnow(),
+                "event_ids": event_ids,
+                "events_count": len(event_ids)
+            }
+        }
+        
+        # В пакетном режиме отметки копятся и пишутся одной bulk_write
+        if self._processed_marks_buffer is not None:
+            self._processed_marks_buffer.append(UpdateOne(query, update, upsert=True))
+            if len(self._processed_marks_buffer) >= self._PROCESSED_MARKS_FLUSH_SIZE:
+                await self._flush_processed_marks()
+            return
+        
         try:
-            await self.db.processed_posts.update_one(
-                {"post_id": post_id, "channel": channel},
-                {
-                    "$set": {
-                        "processed_at": datetime.utcnow(),
-                        "event_ids": event_ids,
-                        "events_count": len(event_ids)
-                    }
-                },
-                upsert=True
-            )
+            await self.db.processed_posts.update_one(query, update, upsert=True)
         
         except Exception as e:
             logger.error(f"Ошибка отметки поста: {e}")
     
+    async def _flush_processed_marks(self):
+        """Запись накопленных отметок processed_posts одной bulk_write."""
+        if not self._processed_marks_buffer:
+            return
+        
+        operations = self._processed_marks_buffer
+        self._processed_marks_buffer = []
+        try:
+            await self.db.processed_posts.bulk_write(operations, ordered=False)
+        
+        except Exception as e:
+            logger.error(f"Ошибка пакетной отметки постов ({len(operations)} шт.): {e}")
+    
     async def _get_embedding(self, text: str) -> Optional[List[float]]:
         """
         Получение эмбеддинга текста через OpenAI API.
@@ -152,6 +246,21 @@ class PostProcessor:
             logger.error(f"Ошибка получения эмбеддинга: {e}", exc_info=True)
             return None
 
+    def _looks_like_event(self, text: str) -> bool:
+        """
+        Дешёвый фильтр перед вызовом LLM.
+        
+        Args:
+            text: Текст поста
+            
+        Returns:
+            True если текст достаточно длинный и содержит признаки события
+        """
+        stripped = (text or "").strip()
+        if len(stripped) < self.min_text_chars:
+            return False
+        return _EVENT_HINT_PATTERN.search(stripped) is not None
+
     @staticmethod
     def _normalize_location_key(event: StructuredEvent) -> str:
         raw_location = f"{event.location or ''} {event.address or ''}".strip().lower()
@@ -310,7 +419,7 @@ class PostProcessor:
             return events
 
         dedup_texts = [self._build_dedup_embedding_text(event) for event in events]
-        embeddings = [await self._get_embedding(text) for text in dedup_texts]
+        embeddings = await asyncio.gather(*(self._get_embedding(text) for text in dedup_texts))
         merged_flags = [False] * len(events)
         merged_events: List[StructuredEvent] = []
         merged_pairs = 0
@@ -346,66 +455,103 @@ class PostProcessor:
             merged_events.append(current_event)
 
         if merged_pairs:
-            logger.info(
-                f"Внутрипостовый merge: объединено пар={merged_pairs}, "
-                f"было={len(events)}, стало={len(merged_events)}"
+            logger.debug(
+                "Внутрипостовый merge: объединено пар=%d, было=%d, стало=%d",
+                merged_pairs, len(events), len(merged_events)
             )
         return merged_events
     
-    async def _save_event(self, event: StructuredEvent) -> Optional[str]:
+    def _build_event_document(self, event: StructuredEvent) -> Dict[str, Any]:
         """
-        Сохранение события в MongoDB.
+        Подготовка документа события для MongoDB.
         
         Args:
             event: Событие для сохранения
             
         Returns:
-            ID сохранённого события или None при ошибке
+            Документ для вставки в коллекцию events
         """
-        try:
-            # Гарантируем совместимость: user_interests синхронизирован с weighted interests
-            if event.interests:
-                event.user_interests = [item.name for item in event.interests if item.name]
+        # Гарантируем совместимость: user_interests синхронизирован с weighted interests
+        if event.interests:
+            event.user_interests = [item.name for item in event.interests if item.name]
 
-            # Гарантируем консистентный формат изображений перед сохранением
-            event.images = self._normalize_image_paths(event.images)
+        # Гарантируем консистентный формат изображений перед сохранением
+        event.images = self._normalize_image_paths(event.images)
 
-            # Подготовка документа
-            event_dict = event.model_dump(mode='json')
-            
-            # Преобразование расписания
-            if event.schedule:
-                event_dict["schedule"] = event.schedule.model_dump(mode='json')
+        # Расписание (union-модель) сериализуется pydantic вместе с событием
+        event_dict = event.model_dump(mode='json')
 
-            # Гарантируем наличие поля images в документе
-            event_dict["images"] = self._normalize_image_paths(
-                event_dict.get("images") or event.images
-            )
-            
-            # Сохранение в коллекцию events
-            result = await self.db.events.insert_one(event_dict)
-            inserted_id = result.inserted_id
+        # Гарантируем наличие поля images в документе
+        event_dict["images"] = event.images
+        # Нативная BSON-дата для фильтров и сортировки API (mode='json' превращает даты в строки)
+        event_dict["event_date"] = self._extract_event_datetime(event) or event.processed_at
+        return event_dict
 
-            # Защита от ложноположительного лога: проверяем, что документ реально записан
-            inserted_doc = await self.db.events.find_one({"_id": inserted_id}, {"_id": 1})
-            if not inserted_doc:
+    async def _save_events(self, events: List[StructuredEvent]) -> List[Optional[str]]:
+        """
+        Пакетное сохранение событий в MongoDB (insert_many + одна проверка).
+        
+        Args:
+            events: События для сохранения
+            
+        Returns:
+            ID сохранённых событий в порядке входного списка (None для несохранённых)
+        """
+        if not events:
+            return []
+        
+        try:
+            # Сериализация CPU-bound, выполняем вне event loop
+            documents = await asyncio.to_thread(
+                lambda: [self._build_event_document(event) for event in events]
+            )
+            for document in documents:
+                document.setdefault("_id", ObjectId())
+            
+            failed_indexes = set()
+            try:
+                await self.db.events.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                failed_indexes = {
+                    error.get("index") for error in e.details.get("writeErrors", [])
+                }
                 logger.error(
-                    "MongoDB insert_one вернул inserted_id, но документ не найден "
-                    f"(db={self.db_name}, collection=events, _id={inserted_id})"
+                    f"Не удалось сохранить {len(failed_indexes)} из {len(documents)} событий: {e}"
                 )
-                return None
             
-            event_id = str(inserted_id)
-            logger.info(
-                f"✅ Событие сохранено в MongoDB: {event.title[:50]} "
-                f"(db={self.db_name}, collection=events, id={event_id})"
-            )
+            candidate_ids = [
+                document["_id"]
+                for idx, document in enumerate(documents)
+                if idx not in failed_indexes
+            ]
+            
+            # Защита от ложноположительного лога: проверяем, что документы реально записаны
+            cursor = self.db.events.find({"_id": {"$in": candidate_ids}}, {"_id": 1})
+            persisted = {doc["_id"] async for doc in cursor}
+            
+            result: List[Optional[str]] = []
+            for event, document in zip(events, documents):
+                inserted_id = document["_id"]
+                if inserted_id not in persisted:
+                    logger.error(
+                        "Событие не найдено после insert_many "
+                        f"(db={self.db_name}, collection=events, _id={inserted_id})"
+                    )
+                    result.append(None)
+                    continue
+                
+                event_id = str(inserted_id)
+                logger.debug(
+                    "✅ Событие сохранено в MongoDB: %s (db=%s, collection=events, id=%s)",
+                    event.title[:50], self.db_name, event_id
+                )
+                result.append(event_id)
             
-            return event_id
+            return result
         
         except Exception as e:
-            logger.error(f"Ошибка сохранения события: {e}", exc_info=True)
-            return None
+            logger.error(f"Ошибка пакетного сохранения событий: {e}", exc_info=True)
+            return [None] * len(events)
     
     async def _update_event_sources(self, event_id: str, new_source: Dict[str, Any]):
         """
@@ -416,24 +562,27 @@ class PostProcessor:
             new_source: Новый источник
         """
         try:
-            from bson import ObjectId
-            
             await self.db.events.update_one(
                 {"_id": ObjectId(event_id)},
                 {"$addToSet": {"sources": new_source}}
             )
             
-            logger.info(f"✅ Источник добавлен к событию {event_id}")
+            logger.debug("✅ Источник добавлен к событию %s", event_id)
         
         except Exception as e:
             logger.error(f"Ошибка обновления источников: {e}")
     
-    async def process_post(self, raw_post: Dict[str, Any]) -> List[StructuredEvent]:
+    async def process_post(
+        self,
+        raw_post: Dict[str, Any],
+        skip_processed_check: bool = False
+    ) -> List[StructuredEvent]:
         """
         Обработка одного поста.
         
         Args:
             raw_post: Словарь с данными сырого поста
+            skip_processed_check: Не проверять processed_posts (пост уже отобран как необработанный)
             
         Returns:
             Список извлечённых событий
@@ -444,23 +593,25 @@ class PostProcessor:
         
         try:
             # Валидация поста
-            post = RawPost(**raw_post)
+            post = RawPost.model_validate(raw_post)
             
-            logger.info("=" * 60)
-            logger.info(f"ОБРАБОТКА ПОСТА: {post.channel}/{post.post_id}")
-            logger.info("=" * 60)
+            logger.debug("Обработка поста: %s/%s", post.channel, post.post_id)
             
             # Проверка обработки
-            if await self._is_post_processed(post.post_id, post.channel):
-                logger.info(f"Пост уже обработан, пропускаем")
+            if not skip_processed_check and await self._is_post_processed(post.post_id, post.channel):
+                logger.debug("Пост уже обработан, пропускаем")
+                return []
+            
+            # Пост без признаков события не отправляем в LLM
+            if not self._looks_like_event(post.text):
+                logger.debug("Пост не похож на анонс события, пропускаем без вызова LLM")
+                await self._mark_post_processed(post.post_id, post.channel, [])
                 return []
             
             # Собираем изображения с поддержкой legacy-поля photo_url
             source_images = self._normalize_image_paths(post.photo_urls)
-            if not source_images:
-                legacy_photo_url = raw_post.get("photo_url")
-                if legacy_photo_url:
-                    source_images = self._normalize_image_paths([legacy_photo_url])
+            if not source_images and post.photo_url:
+                source_images = self._normalize_image_paths([post.photo_url])
 
             # Извлечение событий через LangGraph агент
             events = await self.extraction_agent.run_extraction_graph(
@@ -478,96 +629,113 @@ class PostProcessor:
                 await self._mark_post_processed(post.post_id, post.channel, [])
                 return []
             
-            logger.info(f"Извлечено событий: {len(events)}")
+            logger.debug("Извлечено событий: %d", len(events))
             events = await self.merge_similar_events_within_post(events)
-            logger.info(f"После intra-post merge событий: {len(events)}")
+            logger.debug("После intra-post merge событий: %d", len(events))
+            
+            # Подготовка событий: канонический хэш и эмбеддинг для дедупликации.
+            # Эмбеддинги независимы, запрашиваем их для всех событий поста параллельно
+            for event in events:
+                event.canonical_hash = self.deduplicator.generate_canonical_hash(event)
+            embeddings = await asyncio.gather(
+                *(self._get_embedding(self._build_dedup_embedding_text(event)) for event in events)
+            )
+            
+            prepared: List[Tuple[StructuredEvent, Optional[List[float]]]] = []
+            for idx, (event, embedding) in enumerate(zip(events, embeddings), 1):
+                logger.debug("--- Обработка события %d/%d: %s ---", idx, len(events), event.title[:50])
+                if not embedding:
+                    logger.warning("Не удалось получить эмбеддинг, пропускаем дедупликацию")
+                prepared.append((event, embedding))
             
-            # Обработка каждого события
             saved_event_ids = []
             
-            for idx, event in enumerate(events, 1):
-                logger.info(f"--- Обработка события {idx}/{len(events)}: {event.title[:50]} ---")
+            # Проверка дубликатов и сохранение атомарны относительно других воркеров,
+            # иначе два поста с одним событием могут вставить его дважды
+            async with self._dedup_lock:
+                new_events: List[Tuple[StructuredEvent, Optional[List[float]]]] = []
                 
-                try:
-                    canonical_hash = self.deduplicator.generate_canonical_hash(event)
-                    event.canonical_hash = canonical_hash
-
-                    # Генерация эмбеддинга для дедупликации
-                    embedding_text = self._build_dedup_embedding_text(event)
-                    embedding = await self._get_embedding(embedding_text)
-                    
+                for event, embedding in prepared:
                     if not embedding:
-                        logger.warning("Не удалось получить эмбеддинг, пропускаем дедупликацию")
                         # Сохраняем без дедупликации
-                        event_id = await self._save_event(event)
-                        if event_id:
-                            saved_event_ids.append(event_id)
+                        new_events.append((event, embedding))
                         continue
                     
-                    # Проверка дубликатов
-                    is_duplicate, original_event_id = await self.deduplicator.is_duplicate_event(
-                        event, embedding, canonical_hash=canonical_hash
-                    )
-                    
-                    if is_duplicate and original_event_id:
-                        logger.info(
-                            f"⚠️  Найден дубликат события: {event.title[:50]} "
-                            f"(оригинал: {original_event_id})"
+                    try:
+                        is_duplicate, original_event_id = await self.deduplicator.is_duplicate_event(
+                            event, embedding, canonical_hash=event.canonical_hash
+                        )
+                        
+                        if not (is_duplicate and original_event_id):
+                            new_events.append((event, embedding))
+                            continue
+                        
+                        logger.debug(
+                            "⚠️  Найден дубликат события: %s (оригинал: %s)",
+                            event.title[:50], original_event_id
                         )
                         
                         # Метрика дубликата
                         if metrics:
                             metrics.record_duplicate_found()
                         
-                        # Обновляем источники оригинального события
+                        # Обновляем источники оригинального события в MongoDB и Qdrant
+                        # параллельно: записи независимы друг от друга
                         new_source = event.sources[0] if event.sources else None
                         if new_source:
-                            await self._update_event_sources(
-                                original_event_id,
-                                {
-                                    "channel": new_source.channel,
-                                    "post_id": new_source.post_id,
-                                    "post_url": new_source.post_url
-                                }
-                            )
-                            await self.deduplicator.update_duplicate_sources(
-                                original_event_id, new_source
+                            await asyncio.gather(
+                                self._update_event_sources(
+                                    original_event_id,
+                                    {
+                                        "channel": new_source.channel,
+                                        "post_id": new_source.post_id,
+                                        "post_url": new_source.post_url
+                                    }
+                                ),
+                                self.deduplicator.update_duplicate_sources(
+                                    original_event_id, new_source
+                                )
                             )
                         
                         saved_event_ids.append(original_event_id)
                     
-                    else:
-                        # Новое событие - сохраняем
-                        logger.info(f"Новое событие, сохраняем")
+                    except Exception as e:
+                        logger.error(f"Ошибка обработки события: {e}", exc_info=True)
+                
+                if new_events:
+                    # Новые события поста сохраняются одной пакетной вставкой
+                    logger.debug("Новых событий к сохранению: %d", len(new_events))
+                    event_ids = await self._save_events([event for event, _ in new_events])
+                    
+                    for (event, embedding), event_id in zip(new_events, event_ids):
+                        if not event_id:
+                            continue
                         
-                        # Сохранение в MongoDB
-                        event_id = await self._save_event(event)
+                        # Метрика созданного события
+                        if metrics:
+                            metrics.record_event_created()
                         
-                        if event_id:
-                            # Метрика созданного события
-                            if metrics:
-                                metrics.record_event_created()
-                            
-                            # Метрика сгенерированной афиши
-                            if event.poster_generated and metrics:
-                                metrics.record_poster_generated()
-                            
-                            # Добавление в Qdrant для будущей дедупликации
-                            await self.deduplicator.add_event_to_index(
-                                event, embedding, event_id, canonical_hash=canonical_hash
-                            )
-                            saved_event_ids.append(event_id)
-                
-                except Exception as e:
-                    logger.error(f"Ошибка обработки события: {e}", exc_info=True)
-                    continue
+                        # Метрика сгенерированной афиши
+                        if event.poster_generated and metrics:
+                            metrics.record_poster_generated()
+                        
+                        # Добавление в Qdrant для будущей дедупликации
+                        if embedding:
+                            try:
+                                await self.deduplicator.add_event_to_index(
+                                    event, embedding, event_id, canonical_hash=event.canonical_hash
+                                )
+                            except Exception as e:
+                                logger.error(f"Ошибка индексации события: {e}", exc_info=True)
+                        saved_event_ids.append(event_id)
             
             # Отметка поста как обработанного
             await self._mark_post_processed(post.post_id, post.channel, saved_event_ids)
             
-            logger.info("=" * 60)
-            logger.info(f"ПОСТ ОБРАБОТАН: {len(saved_event_ids)} событий сохранено")
-            logger.info("=" * 60)
+            logger.info(
+                "Пост %s/%s обработан: %d событий сохранено",
+                post.channel, post.post_id, len(saved_event_ids)
+            )
             
             # Запись времени обработки
             duration = time.time() - start_time
@@ -590,9 +758,76 @@ class PostProcessor:
             logger.error(f"Критическая ошибка обработки поста: {e}", exc_info=True)
             raise PostProcessingError(f"Ошибка обработки поста: {e}") from e
     
+    @staticmethod
+    async def _produce_posts(cursor: Any, queue: asyncio.Queue, consumers: int = 1) -> None:
+        """
+        Чтение постов из курсора MongoDB в ограниченную очередь.
+        
+        Args:
+            cursor: Курсор агрегации raw_posts
+            queue: Очередь постов; по завершении кладётся по None на каждого потребителя
+            consumers: Количество потребителей очереди
+        """
+        try:
+            async for raw_post in cursor:
+                await queue.put(raw_post)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            for _ in range(consumers):
+                await queue.put(None)
+            raise
+        for _ in range(consumers):
+            await queue.put(None)
+    
+    async def _post_worker(self, worker_id: int, queue: asyncio.Queue) -> Dict[str, int]:
+        """
+        Воркер пакетной обработки: берёт посты из очереди до получения None.
+        
+        Args:
+            worker_id: Номер воркера (для логов)
+            queue: Очередь постов
+            
+        Returns:
+            Статистика обработки постов этим воркером
+        """
+        stats = {"total": 0, "success": 0, "errors": 0, "events_extracted": 0}
+        
+        while True:
+            raw_post = await queue.get()
+            if raw_post is None:
+                return stats
+            
+            stats["total"] += 1
+            logger.debug(
+                "--- Пост %s/%s (воркер %d) ---",
+                raw_post.get('channel'), raw_post.get('post_id'), worker_id
+            )
+            
+            try:
+                # Агрегация уже отфильтровала обработанные посты через $lookup
+                events = await self.process_post(raw_post, skip_processed_check=True)
+                stats["success"] += 1
+                stats["events_extracted"] += len(events)
+            
+            except InsufficientQuotaError as e:
+                # Критическая ошибка - прерываем обработку
+                logger.critical(_BANNER)
+                logger.critical("❌ КРИТИЧЕСКАЯ ОШИБКА: API QUOTA EXCEEDED")
+                logger.critical(f"   Ошибка: {e}")
+                logger.critical(f"   Воркер {worker_id} обработал постов: {stats['success']}")
+                logger.critical("   Необходимо пополнить баланс API")
+                logger.critical("   Прерывание обработки...")
+                logger.critical(_BANNER)
+                raise
+            
+            except Exception as e:
+                logger.error(f"Ошибка обработки поста {raw_post.get('post_id')}: {e}")
+                stats["errors"] += 1
+
     async def process_new_posts_batch(self, limit: Optional[int] = None) -> Dict[str, int]:
         """
-        Пакетная обработка новых постов из БД.
+        Пакетная обработка новых постов из БД пулом воркеров.
         
         Args:
             limit: Максимальное количество постов для обработки
@@ -600,14 +835,16 @@ class PostProcessor:
         Returns:
             Статистика обработки
         """
-        logger.info("=" * 60)
+        logger.info(_BANNER)
         logger.info("НАЧАЛО ПАКЕТНОЙ ОБРАБОТКИ ПОСТОВ")
-        logger.info("=" * 60)
+        logger.info(_BANNER)
         
         # Получение метрик
         metrics = get_event_metrics() if METRICS_AVAILABLE else None
         
         try:
+            await self.ensure_indexes()
+            
             # Получение необработанных постов
             pipeline = [
                 {
@@ -624,75 +861,79 @@ class PostProcessor:
                                         ]
                                     }
                                 }
-                            }
+                            },
+                            # Нужен только факт наличия, сам документ не тянем
+                            {"$limit": 1},
+                            {"$project": {"_id": 1}}
                         ],
                         "as": "processed"
                     }
                 },
                 {"$match": {"processed": {"$size": 0}}},
+                {"$project": {"processed": 0}},
                 {"$sort": {"message_date": -1}}
             ]
             
             if limit:
                 pipeline.append({"$limit": limit})
             
-            cursor = self.db.raw_posts.aggregate(pipeline)
-            raw_posts = await cursor.to_list(length=None)
-            
-            total = len(raw_posts)
-            logger.info(f"Найдено необработанных постов: {total}")
+            # Курсор читается порциями по мере обработки, весь backlog в память не грузится
+            cursor = self.db.raw_posts.aggregate(
+                pipeline,
+                batchSize=self._CURSOR_BATCH_SIZE,
+                allowDiskUse=True
+            )
             
-            # Обновление метрики новых постов
-            if metrics:
-                metrics.set_pending_posts(total)
+            # Ограниченная очередь: следующие посты подгружаются из MongoDB,
+            # пока воркеры ждут ответа LLM
+            workers_count = self.post_workers
+            queue: asyncio.Queue = asyncio.Queue(
+                maxsize=max(self._PREFETCH_QUEUE_SIZE, workers_count)
+            )
+            producer = asyncio.create_task(
+                self._produce_posts(cursor, queue, consumers=workers_count)
+            )
+            self._processed_marks_buffer = []
+            workers = [
+                asyncio.create_task(self._post_worker(worker_id, queue))
+                for worker_id in range(1, workers_count + 1)
+            ]
             
-            if total == 0:
-                return {"total": 0, "success": 0, "errors": 0, "events_extracted": 0}
+            try:
+                worker_stats = await asyncio.gather(*workers)
+                # Пробрасываем ошибку чтения курсора, если она была
+                await producer
+            finally:
+                for task in (producer, *workers):
+                    if not task.done():
+                        task.cancel()
+                # Обработанные посты отмечаем даже при прерывании пакета
+                await self._flush_processed_marks()
+                self._processed_marks_buffer = None
             
             stats = {
-                "total": total,
-                "success": 0,
-                "errors": 0,
-                "events_extracted": 0
+                key: sum(item[key] for item in worker_stats)
+                for key in ("total", "success", "errors", "events_extracted")
             }
             
-            # Обработка каждого поста
-            for idx, raw_post in enumerate(raw_posts, 1):
-                logger.info(f"\n--- Пост {idx}/{total} ---")
-                
-                try:
-                    events = await self.process_post(raw_post)
-                    stats["success"] += 1
-                    stats["events_extracted"] += len(events)
-                
-                except InsufficientQuotaError as e:
-                    # Критическая ошибка - прерываем обработку
-                    logger.critical("=" * 60)
-                    logger.critical("❌ КРИТИЧЕСКАЯ ОШИБКА: API QUOTA EXCEEDED")
-                    logger.critical(f"   Ошибка: {e}")
-                    logger.critical(f"   Обработано постов: {idx - 1}/{total}")
-                    logger.critical("   Необходимо пополнить баланс API")
-                    logger.critical("   Прерывание обработки...")
-                    logger.critical("=" * 60)
-                    stats["errors"] += 1
-                    # Прерываем цикл и прокидываем ошибку выше
-                    raise
-                
-                except Exception as e:
-                    logger.error(f"Ошибка обработки поста {idx}: {e}")
-                    stats["errors"] += 1
+            logger.info(f"Найдено необработанных постов: {stats['total']}")
+            
+            # Обновление метрики новых постов
+            if metrics:
+                metrics.set_pending_posts(stats["total"])
             
             # Итоговая статистика
-            logger.info("=" * 60)
-            logger.info("ИТОГИ ПАКЕТНОЙ ОБРАБОТКИ:")
-            logger.info(f"  Всего постов: {stats['total']}")
-            logger.info(f"  Успешно обработано: {stats['success']}")
-            logger.info(f"  Ошибок: {stats['errors']}")
-            logger.info(f"  Событий извлечено: {stats['events_extracted']}")
-            logger.info("=" * 60)
+            logger.info(
+                "ИТОГИ ПАКЕТНОЙ ОБРАБОТКИ: всего постов=%d, успешно=%d, ошибок=%d, событий=%d",
+                stats["total"], stats["success"], stats["errors"], stats["events_extracted"]
+            )
             
             return stats
         
+        except InsufficientQuotaError:
+            # Воркеры уже остановлены, ошибка квоты обрабатывается вызывающим кодом
+            raise
+        
         except Exception as e:
             logger.error(f"Критическая ошибка пакетной обработки: {e}", exc_info=True)
             raise PostProcessingError(f"Ошибка пакетной обработки: {e}") from e
@@ -0,0 +1,57 @@
+"""
+Асинхронный rate limiter (token bucket) для запросов к LLM API.
+"""
+
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket: не более max_rate запросов за time_period секунд.
+
+    Использование:
+        async with limiter:
+            await client.chat.completions.create(...)
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        """
+        Инициализация лимитера.
+
+        Args:
+            max_rate: Ёмкость корзины (запросов за период)
+            time_period: Длина периода в секундах
+        """
+        if max_rate <= 0 or time_period <= 0:
+            raise ValueError("max_rate и time_period должны быть положительными")
+        self.max_rate = float(max_rate)
+        self.time_period = float(time_period)
+        self._refill_rate = self.max_rate / self.time_period
+        self._tokens = self.max_rate
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Пополнение корзины пропорционально прошедшему времени."""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.max_rate, self._tokens + elapsed * self._refill_rate)
+
+    async def acquire(self) -> None:
+        """Ожидание свободного токена."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._refill_rate)
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
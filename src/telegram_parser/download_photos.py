@@ -6,6 +6,7 @@
 import asyncio
 import logging
 import os
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -33,6 +34,9 @@ logger = logging.getLogger(__name__)
 class PhotoDownloader:
     """Загрузчик фото из Telegram постов."""
     
+    # Минимальный интервал между обращениями к Telegram за файлами (сек)
+    _MIN_DOWNLOAD_INTERVAL = 0.5
+    
     def __init__(self):
         """Инициализация загрузчика."""
         # Telegram API credentials
@@ -52,6 +56,21 @@ class PhotoDownloader:
         self.client: Optional[TelegramClient] = None
         self.mongo_client: Optional[MongoClient] = None
         self.collection = None
+        
+        # Момент последнего скачивания (time.monotonic) для выдерживания интервала
+        self._last_download_at = 0.0
+    
+    async def _throttle_download(self):
+        """
+        Выдерживание интервала между скачиваниями.
+        
+        Ждёт только остаток интервала с прошлого скачивания: уже
+        скачанные файлы и время самой загрузки паузу не удлиняют.
+        """
+        wait = self._MIN_DOWNLOAD_INTERVAL - (time.monotonic() - self._last_download_at)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_download_at = time.monotonic()
     
     def _init_mongodb(self):
         """Инициализация подключения к MongoDB."""
@@ -119,6 +138,7 @@ class PhotoDownloader:
             )
             
             # Скачивание файла
+            await self._throttle_download()
             await self.client.download_file(location, file=str(file_path))
             
             logger.info(f"Фото скачано: {file_path}")
@@ -158,9 +178,6 @@ class PhotoDownloader:
                     error_count += 1
                 else:
                     skipped_count += 1
-                
-                # Небольшая задержка между скачиваниями
-                await asyncio.sleep(0.5)
             
             logger.info(
                 f"Скачивание завершено. Скачано: {downloaded_count}, "
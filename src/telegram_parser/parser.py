@@ -5,7 +5,7 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 
 import os
 from pathlib import Path
@@ -46,6 +46,9 @@ class TelegramParser:
         # Словарь фильтров для каждого канала
         self.channel_filters: Dict[str, HashtagFilter] = {}
         
+        # Снимок уже скачанных файлов images/{channel} (один scandir на канал)
+        self._existing_images: Dict[str, Set[str]] = {}
+        
         # Клиенты
         self.telegram_client: Optional[TelegramClient] = None
         self.mongo_client: Optional[MongoClient] = None
@@ -177,6 +180,29 @@ class TelegramParser:
         
         return self.channel_filters[channel_username]
     
+    def _get_existing_images(self, channel_username: str) -> Set[str]:
+        """
+        Множество имён файлов, уже лежащих в images/{channel}.
+        
+        Каталог читается одним os.scandir при первом обращении к каналу,
+        дальше множество пополняется по мере скачивания. Это заменяет
+        отдельный stat() на каждое фото.
+        
+        Args:
+            channel_username: Username канала
+            
+        Returns:
+            Изменяемое множество имён файлов
+        """
+        existing = self._existing_images.get(channel_username)
+        if existing is None:
+            images_dir = Path('images') / channel_username
+            images_dir.mkdir(parents=True, exist_ok=True)
+            with os.scandir(images_dir) as entries:
+                existing = {entry.name for entry in entries if entry.is_file()}
+            self._existing_images[channel_username] = existing
+        return existing
+    
     async def _download_photo(self, message, channel_username: str) -> Optional[str]:
         """Скачивает фото из сообщения, сохраняет в images/{channel}, возвращает относительный путь или None."""
         if not message.media or not isinstance(message.media, MessageMediaPhoto):
@@ -185,18 +211,19 @@ class TelegramParser:
         if not photo:
             return None
         images_dir = Path('images') / channel_username
-        images_dir.mkdir(parents=True, exist_ok=True)
+        existing = self._get_existing_images(channel_username)
         file_name = f'{message.id}_{photo.id}.jpg'
         file_path = images_dir / file_name
-        if file_path.exists():
+        if file_name in existing:
             return str(file_path)
         await self.telegram_client.download_media(message, file=str(file_path))
+        existing.add(file_name)
         return str(file_path)
     
     async def _download_photos(self, message, channel_username: str) -> List[str]:
         """Скачивает все фотографии из сообщения (и альбома, если есть), возвращает список относительных путей."""
         images_dir = Path('images') / channel_username
-        images_dir.mkdir(parents=True, exist_ok=True)
+        existing = self._get_existing_images(channel_username)
         photo_paths = []
         entity = channel_username
         # Получаем entity, если это id (или если требуется)
@@ -220,12 +247,16 @@ class TelegramParser:
             for msg in album_msgs:
                 file_name = f'{msg.id}_{msg.media.photo.id}.jpg'
                 file_path = images_dir / file_name
-                await self.telegram_client.download_media(msg, file=str(file_path))
+                if file_name not in existing:
+                    await self.telegram_client.download_media(msg, file=str(file_path))
+                    existing.add(file_name)
                 photo_paths.append(f"{channel_username}/{file_name}")
         elif message.media and isinstance(message.media, MessageMediaPhoto):
             file_name = f'{message.id}_{message.media.photo.id}.jpg'
             file_path = images_dir / file_name
-            await self.telegram_client.download_media(message, file=str(file_path))
+            if file_name not in existing:
+                await self.telegram_client.download_media(message, file=str(file_path))
+                existing.add(file_name)
             photo_paths.append(f"{channel_username}/{file_name}")
         return photo_paths
     
@@ -13,6 +13,7 @@ from apscheduler.triggers.interval import IntervalTrigger
 from .config import Config
 from .parser import TelegramParser
 from src.common.logging_utils import get_log_path
+from src.common.mongo import get_motor_client
 
 # Настройка логирования
 logging.basicConfig(
@@ -40,6 +41,8 @@ class TelegramScheduler:
         self.config = config
         self.scheduler = AsyncIOScheduler()
         self.parser: TelegramParser = None
+        # При недоступной MongoDB проверка первого запуска падает через 5 с, а не через 30
+        self._mongo = get_motor_client(self.config.MONGODB_URI, server_selection_timeout_ms=5000)
         
     async def _is_first_run(self) -> bool:
         """
@@ -49,12 +52,8 @@ class TelegramScheduler:
             True если это первый запуск, False иначе
         """
         try:
-            from pymongo import MongoClient
-            client = MongoClient(self.config.MONGODB_URI, serverSelectionTimeoutMS=5000)
-            db = client[self.config.MONGODB_DB_NAME]
-            collection = db['raw_posts']
-            count = collection.count_documents({})
-            client.close()
+            collection = self._mongo[self.config.MONGODB_DB_NAME]['raw_posts']
+            count = await collection.estimated_document_count()
             return count == 0
         except Exception as e:
             logger.warning(f"Не удалось проверить первый запуск: {e}. Считаем, что это не первый запуск.")
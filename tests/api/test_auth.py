@@ -0,0 +1,198 @@
+"""
+Тесты авторизации: кэш проверенных JWT токенов, создание пользователя.
+"""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from api import auth
+
+
+def test_decode_token_claims_caches_valid_token(monkeypatch):
+    auth._token_cache.clear()
+    token = auth.create_access_token({"sub": "64b8c2f5e8a1b5d7c3f1a123", "nickname": "user"})
+
+    assert auth._decode_token_claims(token) == ("64b8c2f5e8a1b5d7c3f1a123", "user")
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("повторная проверка подписи не ожидается")
+
+    monkeypatch.setattr(auth.jwt, "decode", fail_decode)
+    assert auth._decode_token_claims(token) == ("64b8c2f5e8a1b5d7c3f1a123", "user")
+
+
+def test_decode_token_claims_rejects_invalid_and_expired_tokens():
+    auth._token_cache.clear()
+    expired = auth.create_access_token(
+        {"sub": "64b8c2f5e8a1b5d7c3f1a123", "nickname": "user"},
+        expires_delta=timedelta(seconds=-1),
+    )
+
+    assert auth._decode_token_claims("not-a-token") is None
+    assert auth._decode_token_claims(expired) is None
+    assert not auth._token_cache
+
+
+def test_decode_token_claims_rejects_malformed_sub():
+    auth._token_cache.clear()
+    token = auth.create_access_token({"sub": "../../etc", "nickname": "user"})
+
+    assert auth._decode_token_claims(token) is None
+
+
+def test_verify_token_requires_sub():
+    auth._token_cache.clear()
+    token = auth.create_access_token({"nickname": "user"})
+
+    assert auth._verify_token(token) is None
+
+
+@pytest.mark.asyncio
+async def test_create_user_duplicate_nickname_raises_400():
+    db = Mock()
+    db.users.insert_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+    db.users.find_one = AsyncMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.create_user("user", "Имя", db)
+
+    assert exc_info.value.status_code == 400
+    db.users.find_one.assert_not_called()
+
+
+def test_user_from_document_converts_object_id():
+    user = auth._user_from_document({
+        "_id": ObjectId("64b8c2f5e8a1b5d7c3f1a123"),
+        "nickname": "user",
+        "name": "Имя",
+    })
+
+    assert user.id == "64b8c2f5e8a1b5d7c3f1a123"
+    assert user.interests == []
+    assert user.interest_scores == {}
+    assert user.model_dump(by_alias=True)["_id"] == "64b8c2f5e8a1b5d7c3f1a123"
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_from_token_skips_db():
+    auth._token_cache.clear()
+    token = auth.create_access_token({
+        "sub": "64b8c2f5e8a1b5d7c3f1a123",
+        "nickname": "user",
+        "name": "Имя",
+        "interests": ["музыка"],
+    })
+    credentials = Mock(credentials=token)
+    db = Mock()
+    db.users.find_one = AsyncMock()
+
+    user = await auth.get_current_user_from_token(credentials, db)
+
+    assert user.id == "64b8c2f5e8a1b5d7c3f1a123"
+    assert user.nickname == "user"
+    assert user.interests == ["музыка"]
+    db.users.find_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_from_token_revalidates_old_schema():
+    auth._token_cache.clear()
+    token = auth.create_access_token({
+        "sub": "64b8c2f5e8a1b5d7c3f1a123",
+        "nickname": "user",
+        "v": 0,
+    })
+    auth._user_cache.clear()
+    credentials = Mock(credentials=token)
+    db = Mock()
+    db.users.find_one = AsyncMock(return_value={
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "nickname": "user",
+        "name": "Имя",
+    })
+
+    user = await auth.get_current_user_from_token(credentials, db)
+
+    assert user.name == "Имя"
+    db.users.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_until_invalidated():
+    auth._token_cache.clear()
+    auth._user_cache.clear()
+    token = auth.create_access_token({"sub": "64b8c2f5e8a1b5d7c3f1a123", "nickname": "user"})
+    credentials = Mock(credentials=token)
+    db = Mock()
+    db.users.find_one = AsyncMock(return_value={
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "nickname": "user",
+        "name": "Имя",
+    })
+
+    await auth.get_current_user(credentials, db)
+    await auth.get_current_user(credentials, db)
+    assert db.users.find_one.await_count == 1
+
+    auth.invalidate_user_cache("64b8c2f5e8a1b5d7c3f1a123")
+    await auth.get_current_user(credentials, db)
+    assert db.users.find_one.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_from_token_optional_without_token():
+    assert await auth.get_current_user_from_token_optional(None, Mock()) is None
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_optional_invalid_token_skips_db():
+    auth._token_cache.clear()
+    credentials = Mock(credentials="not-a-token")
+    db = Mock()
+    db.users.find_one = AsyncMock()
+
+    assert await auth.get_current_user_optional(credentials, db) is None
+    assert await auth.get_current_user_from_token_optional(credentials, db) is None
+    db.users.find_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_optional_unknown_user_returns_none():
+    auth._token_cache.clear()
+    auth._user_cache.clear()
+    token = auth.create_access_token({"sub": "64b8c2f5e8a1b5d7c3f1a123", "nickname": "user"})
+    db = Mock()
+    db.users.find_one = AsyncMock(return_value=None)
+
+    assert await auth.get_current_user_optional(Mock(credentials=token), db) is None
+
+
+@pytest.mark.asyncio
+async def test_load_user_concurrent_misses_share_one_query():
+    auth._user_cache.clear()
+    release = asyncio.Event()
+
+    async def slow_find_one(*args, **kwargs):
+        await release.wait()
+        return {"_id": ObjectId("64b8c2f5e8a1b5d7c3f1a123"), "nickname": "user", "name": "Имя"}
+
+    db = Mock()
+    db.users.find_one = AsyncMock(side_effect=slow_find_one)
+
+    pending = [
+        asyncio.ensure_future(auth._load_user("64b8c2f5e8a1b5d7c3f1a123", db))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    users = await asyncio.gather(*pending)
+
+    assert {user.nickname for user in users} == {"user"}
+    db.users.find_one.assert_awaited_once()
+    assert not auth._user_inflight
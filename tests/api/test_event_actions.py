@@ -0,0 +1,317 @@
+"""
+Тесты эндпоинтов действий с мероприятиями.
+"""
+
+import asyncio
+import base64
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from bson import ObjectId
+from fastapi import BackgroundTasks, HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from api import main
+from api.main import (
+    _ACTION_EVENT_PROJECTION,
+    _load_action_event,
+    _load_action_event_with_reaction,
+    dislike_event,
+    get_categories,
+    get_events,
+    like_event,
+    participate_event,
+    unlike_event,
+)
+
+
+@pytest.mark.asyncio
+async def test_load_action_event_reads_only_interest_fields():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value={
+        "_id": ObjectId(event_id),
+        "interests": [{"name": "музыка", "weight": 1.0}],
+        "categories": ["концерт"],
+    })
+
+    event = await _load_action_event(event_id, db)
+
+    assert event.id == event_id
+    assert event.interests[0].name == "музыка"
+    assert db.events.find_one.call_args.args == ({"_id": ObjectId(event_id)}, _ACTION_EVENT_PROJECTION)
+
+
+@pytest.mark.asyncio
+async def test_load_action_event_rejects_invalid_and_missing_ids():
+    main._action_event_cache.clear()
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value=None)
+
+    with pytest.raises(HTTPException) as invalid:
+        await _load_action_event("bad-id", db)
+    with pytest.raises(HTTPException) as missing:
+        await _load_action_event("64b8c2f5e8a1b5d7c3f1a123", db)
+
+    assert invalid.value.status_code == 400
+    assert missing.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_load_action_event_with_reaction_single_aggregate():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    cursor = Mock()
+    cursor.to_list = AsyncMock(return_value=[{
+        "_id": ObjectId(event_id),
+        "categories": ["концерт"],
+        "reaction": [{"action": "dislike"}],
+    }])
+    db = Mock()
+    db.events.aggregate = Mock(return_value=cursor)
+    db.user_actions.find_one = AsyncMock()
+
+    event, current_action = await _load_action_event_with_reaction(event_id, "user-1", db)
+
+    assert event.categories == ["концерт"]
+    assert current_action == "dislike"
+    lookup = db.events.aggregate.call_args.args[0][-1]["$lookup"]
+    assert lookup["pipeline"][0]["$match"]["user_id"] == "user-1"
+    db.user_actions.find_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unlike_event_missing_like_returns_404():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value={"_id": ObjectId(event_id)})
+    db.user_actions.delete_one = AsyncMock(return_value=Mock(deleted_count=0))
+    db.users.find_one_and_update = AsyncMock()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    with pytest.raises(HTTPException) as exc:
+        await unlike_event(event_id, BackgroundTasks(), user, db)
+
+    assert exc.value.status_code == 404
+    db.events.find_one.assert_awaited_once()
+    db.user_actions.delete_one.assert_awaited_once()
+    db.users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unlike_event_missing_event_keeps_action():
+    main._action_event_cache.clear()
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value=None)
+    db.user_actions.delete_one = AsyncMock()
+    background_tasks = BackgroundTasks()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    with pytest.raises(HTTPException) as exc:
+        await unlike_event("64b8c2f5e8a1b5d7c3f1a123", background_tasks, user, db)
+
+    assert exc.value.status_code == 404
+    db.user_actions.delete_one.assert_not_called()
+    assert not background_tasks.tasks
+
+
+@pytest.mark.asyncio
+async def test_load_action_event_cached_between_calls():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value={"_id": ObjectId(event_id), "categories": ["концерт"]})
+    db.user_actions.find_one = AsyncMock(return_value={"action": "like"})
+
+    await _load_action_event(event_id, db)
+    event, current_action = await _load_action_event_with_reaction(event_id, "user-1", db)
+
+    assert event.categories == ["концерт"]
+    assert current_action == "like"
+    db.events.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_participate_event_duplicate_key_returns_409(monkeypatch):
+    main._action_event_cache.clear()
+    monkeypatch.setattr(main, "_participation_unique_index", True)
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value={"_id": ObjectId(event_id)})
+    db.user_actions.find_one = AsyncMock()
+    db.user_actions.insert_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+    db.users.find_one_and_update = AsyncMock()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    with pytest.raises(HTTPException) as exc:
+        await participate_event(event_id, BackgroundTasks(), user, db)
+
+    assert exc.value.status_code == 409
+    db.user_actions.find_one.assert_not_called()
+    db.users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_like_event_defers_interest_update_to_background():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    cursor = Mock()
+    cursor.to_list = AsyncMock(return_value=[{"_id": ObjectId(event_id), "reaction": []}])
+    db = Mock()
+    db.events.aggregate = Mock(return_value=cursor)
+    db.user_actions.insert_one = AsyncMock()
+    db.users.find_one_and_update = AsyncMock()
+    background_tasks = BackgroundTasks()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    response = await like_event(event_id, background_tasks, user, db)
+
+    assert response.message == "Лайк поставлен"
+    db.user_actions.insert_one.assert_awaited_once()
+    db.users.find_one_and_update.assert_not_called()
+    assert len(background_tasks.tasks) == 1
+
+
+
+@pytest.mark.asyncio
+async def test_dislike_event_lost_swap_race_returns_409_without_changes():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    cursor = Mock()
+    cursor.to_list = AsyncMock(
+        return_value=[{"_id": ObjectId(event_id), "reaction": [{"action": "like"}]}]
+    )
+    db = Mock()
+    db.events.aggregate = Mock(return_value=cursor)
+    # Лайк уже заменил параллельный запрос: документ с action=like не найден
+    db.user_actions.update_one = AsyncMock(return_value=Mock(modified_count=0))
+    db.user_actions.insert_one = AsyncMock()
+    background_tasks = BackgroundTasks()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    with pytest.raises(HTTPException) as exc:
+        await dislike_event(event_id, background_tasks, user, db)
+
+    assert exc.value.status_code == 409
+    db.user_actions.insert_one.assert_not_called()
+    assert not background_tasks.tasks
+
+@pytest.mark.asyncio
+async def test_participate_event_missing_event_rolls_back_insert(monkeypatch):
+    main._action_event_cache.clear()
+    monkeypatch.setattr(main, "_participation_unique_index", True)
+    db = Mock()
+    db.events.find_one = AsyncMock(return_value=None)
+    db.user_actions.insert_one = AsyncMock(return_value=Mock(inserted_id="action-1"))
+    db.user_actions.delete_one = AsyncMock()
+    background_tasks = BackgroundTasks()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    with pytest.raises(HTTPException) as exc:
+        await participate_event("64b8c2f5e8a1b5d7c3f1a123", background_tasks, user, db)
+
+    assert exc.value.status_code == 404
+    db.user_actions.delete_one.assert_awaited_once_with({"_id": "action-1"})
+    assert not background_tasks.tasks
+
+
+@pytest.mark.asyncio
+async def test_get_events_loads_user_actions_in_same_aggregate():
+    event_oid = ObjectId("64b8c2f5e8a1b5d7c3f1a123")
+    db = Mock()
+    cursor = Mock()
+    cursor.to_list = AsyncMock(return_value=[{
+        "_id": event_oid,
+        "title": "Концерт",
+        "_event_date": datetime(2026, 11, 1),
+        "user_actions": ["like", "participate"],
+    }])
+    db.events.aggregate = Mock(return_value=cursor)
+    db.user_actions.find = Mock()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    page = await get_events(
+        cursor=None, limit=20, search=None, sort_date="desc", categories=None,
+        min_price=None, max_price=None, date_from=None, date_to=None,
+        for_my_interests=False, current_user=user, db=db
+    )
+
+    pipeline = db.events.aggregate.call_args.args[0]
+    lookup = next(stage["$lookup"] for stage in pipeline if "$lookup" in stage)
+    assert lookup["from"] == "user_actions"
+    assert lookup["pipeline"][0]["$match"]["user_id"] == str(user.id)
+    db.user_actions.find.assert_not_called()
+    assert page.items[0].user_actions == ["like", "participate"]
+
+
+@pytest.mark.asyncio
+async def test_like_event_concurrent_duplicate_returns_409():
+    main._action_event_cache.clear()
+    event_id = "64b8c2f5e8a1b5d7c3f1a123"
+    cursor = Mock()
+    cursor.to_list = AsyncMock(return_value=[{"_id": ObjectId(event_id), "reaction": []}])
+    db = Mock()
+    db.events.aggregate = Mock(return_value=cursor)
+    # Реакцию уже записал параллельный запрос: reaction_unique отклоняет вставку
+    db.user_actions.insert_one = AsyncMock(side_effect=DuplicateKeyError("E11000"))
+    background_tasks = BackgroundTasks()
+    user = Mock(id="64b8c2f5e8a1b5d7c3f1a124")
+
+    with pytest.raises(HTTPException) as exc:
+        await like_event(event_id, background_tasks, user, db)
+
+    assert exc.value.status_code == 409
+    assert not background_tasks.tasks
+
+
+@pytest.mark.asyncio
+async def test_get_events_pushes_cursor_bound_into_first_match():
+    cursor_date = datetime(2026, 11, 1, 18, 0)
+    cursor_oid = ObjectId("64b8c2f5e8a1b5d7c3f1a123")
+    page_cursor = base64.urlsafe_b64encode(
+        f"{cursor_date.isoformat()}|{cursor_oid}".encode("utf-8")
+    ).decode("utf-8")
+    db = Mock()
+    mongo_cursor = Mock()
+    mongo_cursor.to_list = AsyncMock(return_value=[])
+    db.events.aggregate = Mock(return_value=mongo_cursor)
+
+    await get_events(
+        cursor=page_cursor, limit=20, search=None, sort_date="desc", categories=None,
+        min_price=None, max_price=None, date_from=None, date_to=None,
+        for_my_interests=False, current_user=None, db=db
+    )
+
+    first_match = db.events.aggregate.call_args.args[0][0]["$match"]
+    cursor_prefilter = first_match["$and"][-1]["$or"]
+    assert {"event_date": {"$lt": cursor_date}} in cursor_prefilter
+    assert {"event_date": cursor_date, "_id": {"$lt": cursor_oid}} in cursor_prefilter
+    assert {"event_date": None} in cursor_prefilter
+
+
+@pytest.mark.asyncio
+async def test_get_categories_concurrent_misses_share_one_distinct(monkeypatch):
+    monkeypatch.setattr(main, "_categories_cache", (None, 0.0))
+    release = asyncio.Event()
+
+    async def distinct(field):
+        await release.wait()
+        return ["театр", "", "выставка"]
+
+    db = Mock()
+    db.events.distinct = AsyncMock(side_effect=distinct)
+
+    waiters = [asyncio.ensure_future(get_categories(db)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert results == [["выставка", "театр"]] * 3
+    db.events.distinct.assert_awaited_once_with("categories")
+    await asyncio.sleep(0)
+    assert main._categories_inflight is None
+    assert await get_categories(db) == ["выставка", "театр"]
+    db.events.distinct.assert_awaited_once()
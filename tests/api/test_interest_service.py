@@ -2,7 +2,21 @@
 Тесты weighted-механики пересчета интересов пользователя.
 """
 
-from api.interest_service import build_event_tag_weights, apply_action_delta
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from api.interest_service import (
+    build_event_tag_weights,
+    apply_action_delta,
+    REACTION_KIND,
+    replace_user_reaction,
+    update_user_interests,
+    update_user_interests_bulk,
+    update_user_interests_with_reversal,
+)
 from api.models import Event, WeightedInterest
 
 
@@ -56,3 +70,189 @@ def test_apply_action_delta_uses_weight():
 
     assert updated["музыка"] == 2.6  # 1.0 + 2.0 * 0.8
     assert updated["театр"] == 0.4   # 0.0 + 2.0 * 0.2
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_single_pipeline_round_trip():
+    db = Mock()
+    db.users.find_one_and_update = AsyncMock(return_value={
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "interest_scores": {"музыка": 1.0},
+    })
+    db.users.find_one = AsyncMock()
+    db.users.update_one = AsyncMock()
+    event = build_event(interests=[WeightedInterest(name="музыка", weight=1.0)])
+
+    scores = await update_user_interests("64b8c2f5e8a1b5d7c3f1a123", event, "like", db)
+
+    assert scores == {"музыка": 1.0}
+    pipeline = db.users.find_one_and_update.call_args.args[1]
+    assert pipeline[0] == {
+        "$set": {
+            "interest_scores.музыка": {
+                "$add": [{"$ifNull": ["$interest_scores.музыка", 0]}, 1.0]
+            }
+        }
+    }
+    assert "interests" in pipeline[1]["$set"]
+    db.users.find_one.assert_not_called()
+    db.users.update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_accepts_object_id():
+    db = Mock()
+    db.users.find_one_and_update = AsyncMock(return_value={"interest_scores": {}})
+    user_oid = ObjectId("64b8c2f5e8a1b5d7c3f1a123")
+    event = build_event(interests=[WeightedInterest(name="музыка", weight=1.0)])
+
+    await update_user_interests(user_oid, event, "like", db)
+
+    assert db.users.find_one_and_update.call_args.args[0] == {"_id": user_oid}
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_unknown_action_skips_db():
+    db = Mock()
+    db.users.find_one = AsyncMock()
+    db.users.find_one_and_update = AsyncMock()
+    event = build_event(interests=[WeightedInterest(name="музыка", weight=1.0)])
+
+    assert await update_user_interests("64b8c2f5e8a1b5d7c3f1a123", event, "share", db) == {}
+    await update_user_interests_with_reversal(
+        "64b8c2f5e8a1b5d7c3f1a123", event, "like", "like", db
+    )
+
+    db.users.find_one.assert_not_called()
+    db.users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_rejects_invalid_id():
+    db = Mock()
+    db.users.find_one_and_update = AsyncMock()
+    event = build_event(interests=[WeightedInterest(name="музыка", weight=1.0)])
+
+    with pytest.raises(ValueError):
+        await update_user_interests("not-an-id", event, "like", db)
+
+    db.users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_with_reversal_applies_combined_delta():
+    db = Mock()
+    db.users.find_one_and_update = AsyncMock(return_value={
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "interest_scores": {"музыка": 0.2},
+    })
+    event = build_event(interests=[WeightedInterest(name="музыка", weight=1.0)])
+
+    await update_user_interests_with_reversal(
+        "64b8c2f5e8a1b5d7c3f1a123", event, "dislike", "like", db
+    )
+
+    pipeline = db.users.find_one_and_update.call_args.args[1]
+    delta = pipeline[0]["$set"]["interest_scores.музыка"]["$add"][1]
+    assert delta == pytest.approx(-1.8)
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_dotted_tag_falls_back_to_python():
+    db = Mock()
+    db.users.find_one = AsyncMock(return_value={
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "interest_scores": {"hip.hop": 0.4},
+    })
+    db.users.find_one_and_update = AsyncMock()
+    db.users.update_one = AsyncMock(return_value=Mock(matched_count=1))
+    event = build_event(interests=[WeightedInterest(name="hip.hop", weight=1.0)])
+
+    scores = await update_user_interests("64b8c2f5e8a1b5d7c3f1a123", event, "like", db)
+
+    assert scores == {"hip.hop": 1.4}
+    db.users.find_one_and_update.assert_not_called()
+    query, update = db.users.update_one.call_args.args
+    assert query["interest_scores"] == {"hip.hop": 0.4}
+    assert update == {
+        "$set": {"interest_scores": {"hip.hop": 1.4}, "interests": ["hip.hop"]}
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_dotted_tag_retries_after_concurrent_write():
+    db = Mock()
+    db.users.find_one = AsyncMock(side_effect=[
+        {"_id": "64b8c2f5e8a1b5d7c3f1a123", "interest_scores": {"hip.hop": 0.4}},
+        {"_id": "64b8c2f5e8a1b5d7c3f1a123", "interest_scores": {"hip.hop": 1.4}},
+    ])
+    # Первая условная запись не совпала: другой пересчет успел изменить interest_scores
+    db.users.update_one = AsyncMock(side_effect=[Mock(matched_count=0), Mock(matched_count=1)])
+    event = build_event(interests=[WeightedInterest(name="hip.hop", weight=1.0)])
+
+    scores = await update_user_interests("64b8c2f5e8a1b5d7c3f1a123", event, "like", db)
+
+    assert scores == {"hip.hop": 2.4}
+    assert db.users.update_one.await_count == 2
+    assert db.users.update_one.call_args.args[0]["interest_scores"] == {"hip.hop": 1.4}
+
+
+@pytest.mark.asyncio
+async def test_update_user_interests_bulk_merges_actions():
+    db = Mock()
+    db.users.find_one_and_update = AsyncMock(return_value={
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "interest_scores": {"музыка": 3.0, "театр": -0.8},
+    })
+    music = build_event(interests=[WeightedInterest(name="музыка", weight=1.0)])
+    theatre = build_event(
+        _id="64b8c2f5e8a1b5d7c3f1a124",
+        interests=[WeightedInterest(name="театр", weight=1.0)],
+    )
+
+    await update_user_interests_bulk(
+        "64b8c2f5e8a1b5d7c3f1a123",
+        [(music, "like"), (music, "participate"), (theatre, "dislike")],
+        db,
+    )
+
+    db.users.find_one_and_update.assert_awaited_once()
+    stage = db.users.find_one_and_update.call_args.args[1][0]["$set"]
+    assert stage["interest_scores.музыка"]["$add"][1] == pytest.approx(3.0)
+    assert stage["interest_scores.театр"]["$add"][1] == pytest.approx(-0.8)
+
+
+@pytest.mark.asyncio
+async def test_replace_user_reaction_swaps_in_place():
+    db = Mock()
+    db.user_actions.update_one = AsyncMock(return_value=Mock(modified_count=1))
+
+    outcome = await replace_user_reaction("user-1", "event-1", "like", "dislike", db)
+
+    assert outcome == (True, True)
+    query, update = db.user_actions.update_one.call_args.args
+    assert query == {"user_id": "user-1", "event_id": "event-1", "action": "dislike"}
+    assert update["$set"]["action"] == "like"
+    assert update["$set"]["kind"] == REACTION_KIND
+
+
+@pytest.mark.asyncio
+async def test_replace_user_reaction_lost_swap_changes_nothing():
+    db = Mock()
+    db.user_actions.update_one = AsyncMock(return_value=Mock(modified_count=0))
+    db.user_actions.insert_one = AsyncMock()
+
+    outcome = await replace_user_reaction("user-1", "event-1", "like", "dislike", db)
+
+    assert outcome == (False, False)
+    db.user_actions.insert_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_replace_user_reaction_duplicate_key_reports_not_stored():
+    db = Mock()
+    db.user_actions.insert_one = AsyncMock(side_effect=DuplicateKeyError("E11000 duplicate key"))
+
+    outcome = await replace_user_reaction("user-1", "event-1", "like", None, db)
+
+    assert outcome == (False, False)
@@ -0,0 +1,34 @@
+"""
+Тесты жизненного цикла приложения API.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from api import main
+
+
+@pytest.mark.asyncio
+async def test_lifespan_creates_indexes_and_closes_connection(monkeypatch):
+    db = Mock()
+    db.events.create_indexes = AsyncMock()
+    db.users.create_index = AsyncMock()
+    db.user_actions.create_index = AsyncMock(
+        side_effect=[None, OperationFailure("duplicate participations"), None]
+    )
+    close = AsyncMock()
+    monkeypatch.setattr(main, "connect_to_mongo", AsyncMock())
+    monkeypatch.setattr(main, "close_mongo_connection", close)
+    monkeypatch.setattr(main, "get_database", lambda: db)
+    monkeypatch.setattr(main, "_build_tag_normalizer", lambda: None)
+    monkeypatch.setattr(main, "_participation_unique_index", True)
+
+    async with main.lifespan(main.app):
+        db.events.create_indexes.assert_awaited_once()
+        assert db.user_actions.create_index.await_count == 3
+        assert main._participation_unique_index is False
+        close.assert_not_awaited()
+
+    close.assert_awaited_once()
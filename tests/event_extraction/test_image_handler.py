@@ -76,3 +76,53 @@ def test_image_to_base64_nonexistent():
     
     result = handler.image_to_base64("nonexistent_file.jpg")
     assert result is None
+
+
+def test_image_to_base64_directory_path(tmp_path):
+    """Каталог вместо файла возвращает None."""
+    handler = ImageHandler(images_dir=str(tmp_path))
+    (tmp_path / "subdir").mkdir()
+    
+    assert handler.image_to_base64("subdir") is None
+
+
+@pytest.mark.asyncio
+async def test_http_session_reused_and_closed(tmp_path):
+    """HTTP-сессия создаётся один раз и закрывается через close()."""
+    handler = ImageHandler(images_dir=str(tmp_path))
+    
+    session = handler._get_session()
+    assert handler._get_session() is session
+    
+    await handler.close()
+    assert session.closed
+    assert handler._session is None
+
+
+@pytest.mark.asyncio
+async def test_parallel_downloads_get_distinct_files(tmp_path):
+    """Одновременно скачанные афиши не перезаписывают друг друга."""
+    import asyncio
+    from unittest.mock import AsyncMock, MagicMock
+    
+    def make_response(content):
+        response = MagicMock()
+        response.status = 200
+        response.read = AsyncMock(return_value=content)
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        return context
+    
+    session = MagicMock()
+    session.get = MagicMock(side_effect=[make_response(b"first"), make_response(b"second")])
+    handler = ImageHandler(images_dir=str(tmp_path))
+    handler._get_session = lambda: session
+    
+    paths = await asyncio.gather(
+        handler.download_image_from_url("https://cdn.example/a.png"),
+        handler.download_image_from_url("https://cdn.example/b.png"),
+    )
+    
+    assert paths[0] != paths[1]
+    assert {(tmp_path / path).read_bytes() for path in paths} == {b"first", b"second"}
@@ -8,6 +8,7 @@ from datetime import datetime
 
 from src.event_extraction.langgraph_agent import EventExtractionGraph
 from src.event_extraction.models import ExtractionState
+from src.event_extraction.llm_cache import LLMResponseCache
 
 
 @pytest.fixture
@@ -58,6 +59,29 @@ async def test_call_llm_success(mock_llm_client, mock_image_handler):
     assert response == "Test response"
 
 
+@pytest.mark.asyncio
+async def test_call_llm_uses_response_cache(mock_llm_client, mock_image_handler, tmp_path):
+    """Повторный запрос с теми же сообщениями берётся из кэша без вызова LLM."""
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler,
+        response_cache=cache
+    )
+    
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content="Cached response"))]
+    mock_llm_client.chat.completions.create.return_value = mock_response
+    
+    messages = [{"role": "user", "content": "Test"}]
+    first = await agent._call_llm(messages)
+    second = await agent._call_llm(messages)
+    
+    assert first == second == "Cached response"
+    mock_llm_client.chat.completions.create.assert_called_once()
+    cache.close()
+
+
 @pytest.mark.asyncio
 async def test_split_into_events(mock_llm_client, mock_image_handler):
     """Тест разделения поста на события."""
@@ -146,3 +170,195 @@ async def test_process_images_generation(mock_llm_client, mock_image_handler):
     mock_image_handler.generate_event_poster.assert_called_once()
     assert result.events[0].images == ["generated_poster.png"]
     assert result.events[0].poster_generated
+
+
+@pytest.mark.asyncio
+async def test_process_images_generation_isolates_failures(mock_llm_client, mock_image_handler):
+    """Ошибка генерации одной афиши не мешает остальным событиям."""
+    from src.event_extraction.models import StructuredEvent, EventSource
+    
+    mock_image_handler.generate_event_poster = AsyncMock(
+        side_effect=[RuntimeError("boom"), "poster_2.png"]
+    )
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler
+    )
+    
+    state = ExtractionState(raw_text="Test", images=[], channel="test", post_id=123)
+    for title in ("Event 1", "Event 2"):
+        state.events.append(
+            StructuredEvent(title=title, sources=[EventSource(channel="test", post_id=123)])
+        )
+    
+    result = await agent._process_images(state)
+    
+    assert mock_image_handler.generate_event_poster.call_count == 2
+    assert not result.events[0].poster_generated
+    assert result.events[1].images == ["poster_2.png"]
+    assert result.events[1].poster_generated
+    assert len(result.errors) == 1
+
+
+@pytest.mark.asyncio
+async def test_process_images_generation_propagates_cancellation(mock_llm_client, mock_image_handler):
+    """Отменённая генерация афиши пробрасывается, а не сохраняется как путь."""
+    import asyncio
+    from src.event_extraction.models import StructuredEvent, EventSource
+    
+    mock_image_handler.generate_event_poster = AsyncMock(side_effect=asyncio.CancelledError())
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler
+    )
+    
+    state = ExtractionState(raw_text="Test", images=[], channel="test", post_id=123)
+    state.events.append(
+        StructuredEvent(title="Event 1", sources=[EventSource(channel="test", post_id=123)])
+    )
+    
+    with pytest.raises(asyncio.CancelledError):
+        await agent._process_images(state)
+    
+    assert state.events[0].images == []
+
+
+@pytest.mark.asyncio
+async def test_call_llm_respects_concurrency_limit(mock_llm_client, mock_image_handler):
+    """Одновременных запросов к LLM не больше llm_concurrency."""
+    import asyncio
+    
+    in_flight = 0
+    peak = 0
+    
+    async def fake_create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return Mock(choices=[Mock(message=Mock(content="ok"))])
+    
+    mock_llm_client.chat.completions.create = fake_create
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler,
+        llm_concurrency=2
+    )
+    
+    await asyncio.gather(
+        *(agent._call_llm([{"role": "user", "content": str(i)}]) for i in range(6))
+    )
+    
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_call_llm_retries_on_rate_limit(mock_llm_client, mock_image_handler, monkeypatch):
+    """При 429 запрос повторяется с backoff."""
+    import httpx
+    from openai import RateLimitError
+    
+    request = httpx.Request("POST", "https://example.invalid/v1/chat/completions")
+    rate_limit = RateLimitError(
+        "rate limited",
+        response=httpx.Response(429, request=request),
+        body=None
+    )
+    mock_llm_client.chat.completions.create = AsyncMock(
+        side_effect=[rate_limit, Mock(choices=[Mock(message=Mock(content="ok"))])]
+    )
+    monkeypatch.setattr(EventExtractionGraph, "_RATE_LIMIT_MAX_WAIT", 0.01)
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler
+    )
+    
+    response = await agent._call_llm([{"role": "user", "content": "Test"}])
+    
+    assert response == "ok"
+    assert mock_llm_client.chat.completions.create.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_call_llm_honors_retry_after(mock_llm_client, mock_image_handler, monkeypatch):
+    """Пауза перед повтором берётся из заголовка Retry-After."""
+    import httpx
+    from openai import RateLimitError
+    from src.event_extraction import langgraph_agent
+    
+    request = httpx.Request("POST", "https://example.invalid/v1/chat/completions")
+    rate_limit = RateLimitError(
+        "rate limited",
+        response=httpx.Response(429, request=request, headers={"Retry-After": "7"}),
+        body=None
+    )
+    mock_llm_client.chat.completions.create = AsyncMock(
+        side_effect=[rate_limit, Mock(choices=[Mock(message=Mock(content="ok"))])]
+    )
+    sleeps = []
+    
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+    
+    monkeypatch.setattr(langgraph_agent.asyncio, "sleep", fake_sleep)
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler
+    )
+    
+    response = await agent._call_llm([{"role": "user", "content": "Test"}])
+    
+    assert response == "ok"
+    assert sleeps == [7.0]
+
+
+@pytest.mark.asyncio
+async def test_run_extraction_graph_skips_blank_text(mock_llm_client, mock_image_handler):
+    """Пост без текста не запускает граф и не вызывает LLM."""
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler
+    )
+    
+    events = await agent.run_extraction_graph(text="   \n", images=["photo.jpg"])
+    
+    assert events == []
+    mock_llm_client.chat.completions.create.assert_not_called()
+    mock_image_handler.generate_event_poster.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_extract_event_data_calls_llm_concurrently(mock_llm_client, mock_image_handler):
+    """Запросы извлечения по событиям поста выполняются параллельно, порядок сохраняется."""
+    import asyncio
+    import json
+
+    agent = EventExtractionGraph(
+        llm_client=mock_llm_client,
+        image_handler=mock_image_handler
+    )
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_call_llm(messages):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        title = messages[-1]["content"].split("\n", 1)[1]
+        return json.dumps({"title": title})
+
+    agent._call_llm = fake_call_llm
+    state = ExtractionState(
+        raw_text="Событие А\n\nСобытие Б",
+        channel="test",
+        post_id=1,
+        raw_events=["Событие А", "  ", "Событие Б"]
+    )
+
+    result = await agent._extract_event_data(state)
+
+    assert max_in_flight == 2
+    assert [event.title for event in result.events] == ["Событие А", "Событие Б"]
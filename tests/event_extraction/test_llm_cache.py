@@ -0,0 +1,50 @@
+"""
+Тесты SQLite кэша ответов LLM.
+"""
+
+import sqlite3
+
+from src.event_extraction import llm_cache
+from src.event_extraction.llm_cache import LLMResponseCache
+
+
+def test_cache_roundtrip(tmp_path):
+    """Сохранённый ответ возвращается по ключу."""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    key = cache.make_key("gpt-4o", [{"role": "user", "content": "hi"}], 0.7, 100)
+
+    assert cache.get(key) is None
+    cache.set(key, "ответ")
+    assert cache.get(key) == "ответ"
+    cache.close()
+
+
+def test_cache_entry_expires_after_ttl(tmp_path, monkeypatch):
+    """Запись старше ttl_seconds считается промахом."""
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+
+    cache.set("key", "ответ")
+    now[0] += 30
+    assert cache.get("key") == "ответ"
+    now[0] += 31
+    assert cache.get("key") is None
+    cache.close()
+
+
+def test_cache_migrates_table_without_created_at(tmp_path):
+    """База старого формата дополняется колонкой created_at."""
+    path = tmp_path / "cache.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE llm_responses (hash TEXT PRIMARY KEY, response TEXT NOT NULL)")
+    conn.execute("INSERT INTO llm_responses VALUES ('key', 'старый')")
+    conn.commit()
+    conn.close()
+
+    cache = LLMResponseCache(str(path))
+
+    assert cache.get("key") == "старый"
+    cache.set("key", "новый")
+    assert cache.get("key") == "новый"
+    cache.close()
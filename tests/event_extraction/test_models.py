@@ -12,7 +12,8 @@ from src.event_extraction.models import (
     ScheduleFuzzy,
     PriceInfo,
     EventSource,
-    ExtractionState
+    ExtractionState,
+    RawPost
 )
 
 
@@ -129,3 +130,19 @@ def test_categories_validation():
     
     # Должны быть удалены пустые строки и обрезаны пробелы
     assert event.categories == ["концерт", "музыка"]
+
+
+def test_raw_post_from_mongo_document():
+    """RawPost валидируется из документа Mongo с лишними полями и legacy photo_url."""
+    post = RawPost.model_validate({
+        "_id": "64b8c2f5e8a1b5d7c3f1a123",
+        "text": "Лекция 20 декабря",
+        "post_id": 7,
+        "channel": "test_channel",
+        "photo_url": "legacy.jpg",
+    })
+    
+    assert post.photo_url == "legacy.jpg"
+    assert post.photo_urls is None
+    with pytest.raises(Exception):
+        post.text = "другой текст"
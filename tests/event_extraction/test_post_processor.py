@@ -145,13 +145,60 @@ async def test_process_post_already_processed(mock_clients):
 
 
 @pytest.mark.asyncio
-async def test_save_event_persists_canonical_hash_without_embedding_vector():
+async def test_process_post_skips_non_event_text(mock_clients):
+    """Пост без признаков события помечается обработанным без вызова LLM."""
+    db_client, qdrant_client, llm_client, image_handler = mock_clients
+    
+    db_mock = Mock()
+    db_mock.processed_posts.find_one = AsyncMock(return_value=None)
+    db_mock.processed_posts.update_one = AsyncMock()
+    db_client.__getitem__ = Mock(return_value=db_mock)
+    
+    processor = PostProcessor(
+        db_client=db_client,
+        qdrant_client=qdrant_client,
+        llm_client=llm_client,
+        image_handler=image_handler
+    )
+    processor.extraction_agent = Mock()
+    processor.extraction_agent.run_extraction_graph = AsyncMock()
+    
+    raw_post = {
+        "text": "Всем хорошего дня!",
+        "post_id": 124,
+        "channel": "test",
+        "photo_urls": [],
+        "hashtags": []
+    }
+    
+    events = await processor.process_post(raw_post)
+    
+    assert events == []
+    processor.extraction_agent.run_extraction_graph.assert_not_called()
+    db_mock.processed_posts.update_one.assert_called_once()
+
+
+def test_looks_like_event_detects_date_and_time():
+    """Фильтр пропускает тексты с датой или временем."""
+    processor = object.__new__(PostProcessor)
+    processor.min_text_chars = 20
+    
+    assert processor._looks_like_event("Концерт 15 декабря в клубе Космонавт")
+    assert processor._looks_like_event("Лекция начнётся в 19:00, вход свободный")
+    assert not processor._looks_like_event("Подписывайтесь на наш канал и друзей")
+    assert not processor._looks_like_event("19:00")
+
+
+@pytest.mark.asyncio
+async def test_save_events_persists_canonical_hash_without_embedding_vector():
     """При сохранении в Mongo сохраняется canonical_hash, но не embedding_vector."""
     processor = object.__new__(PostProcessor)
     processor.db = Mock()
     processor.db.events = Mock()
-    processor.db.events.insert_one = AsyncMock(return_value=Mock(inserted_id="507f1f77bcf86cd799439011"))
-    processor.db.events.find_one = AsyncMock(return_value={"_id": "507f1f77bcf86cd799439011"})
+    processor.db.events.insert_many = AsyncMock()
+    processor.db.events.find = Mock(
+        side_effect=lambda query, projection: _AsyncCursor([{"_id": _id} for _id in query["_id"]["$in"]])
+    )
     processor.db_name = "events_db"
 
     event = StructuredEvent(
@@ -160,12 +207,60 @@ async def test_save_event_persists_canonical_hash_without_embedding_vector():
         sources=[EventSource(channel="test", post_id=1)],
     )
 
-    saved_id = await PostProcessor._save_event(processor, event)
+    saved_ids = await PostProcessor._save_events(processor, [event])
 
-    assert saved_id == "507f1f77bcf86cd799439011"
-    insert_payload = processor.db.events.insert_one.call_args.args[0]
+    insert_payload = processor.db.events.insert_many.call_args.args[0][0]
+    assert saved_ids == [str(insert_payload["_id"])]
     assert insert_payload["canonical_hash"] == "fixed-hash-value"
     assert "embedding_vector" not in insert_payload
+    # Без расписания event_date берётся из processed_at и остаётся нативным datetime
+    assert insert_payload["event_date"] == event.processed_at
+
+
+def test_build_event_document_stores_native_event_date():
+    """event_date берётся из расписания и сохраняется как datetime, а не ISO-строка."""
+    processor = object.__new__(PostProcessor)
+    event = StructuredEvent(
+        title="Концерт",
+        schedule=ScheduleExact(date_start=datetime(2026, 3, 10, 19, 0)),
+        sources=[EventSource(channel="test", post_id=1)],
+    )
+
+    document = PostProcessor._build_event_document(processor, event)
+
+    assert document["event_date"] == datetime(2026, 3, 10, 19, 0)
+    assert isinstance(document["schedule"]["date_start"], str)
+
+
+@pytest.mark.asyncio
+async def test_save_events_uses_single_insert_many():
+    """Новые события поста сохраняются одним insert_many с одной проверкой."""
+    processor = object.__new__(PostProcessor)
+    processor.db = Mock()
+    processor.db_name = "events_db"
+    inserted = []
+
+    async def fake_insert_many(documents, ordered=True):
+        inserted.extend(documents)
+
+    def fake_find(query, projection):
+        ids = [doc["_id"] for doc in inserted]
+        return _AsyncCursor([{"_id": _id} for _id in ids])
+
+    processor.db.events.insert_many = AsyncMock(side_effect=fake_insert_many)
+    processor.db.events.find = Mock(side_effect=fake_find)
+
+    events = [
+        StructuredEvent(title=f"Событие {i}", sources=[EventSource(channel="test", post_id=1)])
+        for i in range(3)
+    ]
+
+    event_ids = await PostProcessor._save_events(processor, events)
+
+    processor.db.events.insert_many.assert_called_once()
+    processor.db.events.find.assert_called_once()
+    assert event_ids == [str(doc["_id"]) for doc in inserted]
+    assert all("embedding_vector" not in doc for doc in inserted)
 
 
 @pytest.mark.asyncio
@@ -209,3 +304,104 @@ async def test_merge_similar_events_within_post_combines_duplicates():
     assert set(merged[0].categories) == {"япония", "восток"}
     assert round(sum(item.weight for item in merged[0].interests), 4) == 1.0
     assert set(merged[0].user_interests) == {"япония", "восток"}
+
+
+class _AsyncCursor:
+    """Минимальный асинхронный курсор для тестов."""
+
+    def __init__(self, items):
+        self._items = list(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._items:
+            raise StopAsyncIteration
+        return self._items.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_process_new_posts_batch_consumes_queue():
+    """Пакетная обработка проходит все посты из курсора и собирает статистику."""
+    processor = object.__new__(PostProcessor)
+    processor.post_workers = 2
+    processor._indexes_ready = True
+    processor.db = Mock()
+    processor.db.raw_posts.aggregate = Mock(
+        return_value=_AsyncCursor([{"post_id": 1}, {"post_id": 2}, {"post_id": 3}])
+    )
+
+    async def fake_process_post(raw_post, skip_processed_check=False):
+        assert skip_processed_check
+        if raw_post["post_id"] == 2:
+            raise RuntimeError("boom")
+        return [Mock()]
+
+    processor.process_post = fake_process_post
+
+    stats = await PostProcessor.process_new_posts_batch(processor)
+
+    assert stats == {"total": 3, "success": 2, "errors": 1, "events_extracted": 2}
+
+
+@pytest.mark.asyncio
+async def test_process_new_posts_batch_propagates_quota_error():
+    """Ошибка квоты останавливает воркеров и пробрасывается без обёртки."""
+    from src.event_extraction.exceptions import InsufficientQuotaError
+
+    processor = object.__new__(PostProcessor)
+    processor.post_workers = 2
+    processor._indexes_ready = True
+    processor.db = Mock()
+    processor.db.raw_posts.aggregate = Mock(
+        return_value=_AsyncCursor([{"post_id": i} for i in range(10)])
+    )
+    processor.process_post = AsyncMock(side_effect=InsufficientQuotaError("quota"))
+
+    with pytest.raises(InsufficientQuotaError):
+        await PostProcessor.process_new_posts_batch(processor)
+
+
+@pytest.mark.asyncio
+async def test_process_new_posts_batch_flushes_processed_marks_in_bulk():
+    """В пакетном режиме отметки processed_posts пишутся одной bulk_write."""
+    processor = object.__new__(PostProcessor)
+    processor.post_workers = 2
+    processor._indexes_ready = True
+    processor.db = Mock()
+    processor.db.raw_posts.aggregate = Mock(
+        return_value=_AsyncCursor([{"post_id": i, "channel": "test"} for i in range(3)])
+    )
+    processor.db.processed_posts.update_one = AsyncMock()
+    processor.db.processed_posts.bulk_write = AsyncMock()
+
+    async def fake_process_post(raw_post, skip_processed_check=False):
+        await processor._mark_post_processed(raw_post["post_id"], raw_post["channel"], [])
+        return []
+
+    processor.process_post = fake_process_post
+
+    stats = await PostProcessor.process_new_posts_batch(processor)
+
+    assert stats["success"] == 3
+    processor.db.processed_posts.update_one.assert_not_called()
+    processor.db.processed_posts.bulk_write.assert_called_once()
+    assert len(processor.db.processed_posts.bulk_write.call_args.args[0]) == 3
+    assert processor._processed_marks_buffer is None
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_creates_indexes_once():
+    """Индексы для выборки необработанных постов создаются один раз."""
+    processor = object.__new__(PostProcessor)
+    processor._indexes_ready = False
+    processor.db = Mock()
+    processor.db.processed_posts.create_index = AsyncMock()
+    processor.db.raw_posts.create_index = AsyncMock()
+
+    await processor.ensure_indexes()
+    await processor.ensure_indexes()
+
+    processor.db.processed_posts.create_index.assert_awaited_once_with([("post_id", 1), ("channel", 1)])
+    processor.db.raw_posts.create_index.assert_awaited_once_with([("message_date", -1)])
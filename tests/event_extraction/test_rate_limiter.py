@@ -0,0 +1,35 @@
+"""
+Тесты для rate limiter.
+"""
+
+import time
+
+import pytest
+
+from src.event_extraction.rate_limiter import AsyncRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_allows_burst_then_waits():
+    """Первые max_rate запросов проходят сразу, следующий ждёт пополнения."""
+    limiter = AsyncRateLimiter(max_rate=2, time_period=0.2)
+    
+    start = time.monotonic()
+    async with limiter:
+        pass
+    async with limiter:
+        pass
+    burst_elapsed = time.monotonic() - start
+    
+    async with limiter:
+        pass
+    total_elapsed = time.monotonic() - start
+    
+    assert burst_elapsed < 0.05
+    assert total_elapsed >= 0.08
+
+
+def test_rate_limiter_rejects_non_positive_rate():
+    """Нулевой лимит не допускается."""
+    with pytest.raises(ValueError):
+        AsyncRateLimiter(max_rate=0)